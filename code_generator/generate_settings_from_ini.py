@@ -1,793 +1,1022 @@
 #!/usr/bin/env python3
+import io
 import re
 import sys
 from pathlib import Path
+from string import Template
 from datetime import datetime
-import configparser
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Any
+
+# 预编译的正则表达式
+_META_SPLIT_RE = re.compile(r",(?=\s*[a-zA-Z]+[:=])")  # comment中元数据的分隔符
+
+# 可复用的错误信息片段
+_ERR_MSG = {
+    "comment_format": "(标准格式: '; key: type=..., default=..., min=..., max=...' 或 '; key: type=..., default=...')",
+    "kv_required": "comment 的下一行必须是 key-value对",
+    "section_after_blank": "空行后面必须是一个新的 section",
+    "value_illegal": "key-value对中的 value 值非法.",
+    "default_illegal": "comment 中的default值非法.",
+    "min_illegal": "comment 中的min值非法.",
+    "max_illegal": "comment 中的max值非法.",
+}
+
+
+def _is_c_identifier(name):
+    """判断name是否为合法的C语言标识符(仅限ASCII字母、数字和下划线, 且不以数字开头)"""
+    return name.isascii() and name.isidentifier()
+
+
+def _split_meta(meta_part):
+    """按逗号分割comment中的元数据"""
+    # 常见情况下每段都是"key=value"且value中不含逗号, 直接用str.split即可;
+    # 否则退回到正则分割, 以支持value中含有逗号的情况
+    items = meta_part.split(",")
+    for item in items:
+        meta_key, sep, meta_value = item.partition("=")
+        meta_key = meta_key.lstrip()
+        if not sep or "=" in meta_value or not (meta_key.isascii() and meta_key.isalpha()):
+            return _META_SPLIT_RE.split(meta_part)
+    return items
+
+
+def _die(line_num, msg):
+    """输出第line_num行的格式错误信息并退出"""
+    sys.stderr.write(f"第 {line_num} 行格式错误: {msg}\n")
+    sys.exit(1)
+
+
+def _die_raw(msg):
+    """原样输出错误信息并退出"""
+    sys.stderr.write(msg + "\n")
+    sys.exit(1)
+
+
+@dataclass(slots=True)
+class Setting:
+    """一个配置项的解析结果"""
+
+    section: str
+    key: str
+    value: Any
+    default: Any
+    type: str
+    min: Any
+    max: Any
+    comment: str
+    comment_line: int
+    kv_line: int
+    str_len: int | None = None  # string:len 类型中的len, 其他类型为None
+
+
+def _validate_int(kv_value, default_val_str, min_val_str, max_val_str, line_num, kv_line_num):
+    """验证int类型的配置项, 返回(value, default, min, max)"""
+    # 验证value是整数
+    try:
+        value = int(kv_value)
+    except ValueError:
+        _die(kv_line_num, _ERR_MSG["value_illegal"])
+
+    # 验证default是整数
+    try:
+        default_val = int(default_val_str)
+    except ValueError:
+        _die(kv_line_num, _ERR_MSG["default_illegal"])
+
+    if min_val_str is None or min_val_str == "":
+        _die(kv_line_num, "int类型的 comment 中必须指明min. (标准格式: '; key: type=int, default=..., min=..., max=...')")
+
+    if max_val_str is None or max_val_str == "":
+        _die(kv_line_num, "int类型的 comment 中必须指明max. (标准格式: '; key: type=int, default=..., min=..., max=...')")
+
+    # 验证min是整数
+    try:
+        min_val = int(min_val_str)
+    except ValueError:
+        _die(kv_line_num, _ERR_MSG["min_illegal"])
+
+    # 验证max是整数（如存在）
+    try:
+        max_val = int(max_val_str)
+    except ValueError:
+        _die(kv_line_num, _ERR_MSG["max_illegal"])
+
+    # 验证value等于default
+    if value != default_val:
+        _die(kv_line_num, f"key-value对中的 value:{value} 必须等于 comment 中的 default:{default_val}")
+
+    # 验证范围
+    if default_val < min_val:
+        _die(line_num, f"comment 中的 default:{default_val} 必须 >= min:{min_val}")
+
+    if default_val > max_val:
+        _die(line_num, f"comment 中的 default:{default_val} 必须 <= max:{max_val}")
+
+    return value, default_val, min_val, max_val
+
+
+def _validate_bool(kv_value, default_val_str, min_val_str, max_val_str, line_num, kv_line_num):
+    """验证bool类型的配置项, 返回(value, default, min, max)"""
+    valid_bools = ["true", "false"]
+
+    value = kv_value
+    default_val = default_val_str
+
+    # 验证value是有效的布尔值
+    if kv_value not in valid_bools:
+        _die(kv_line_num, f"key-value对中的 value:{kv_value} 非法. 暂时只支持: {', '.join(valid_bools)}")
+
+    # 验证default是有效的布尔值
+    if default_val_str not in valid_bools:
+        _die(line_num, f"comment中的 default:{default_val_str} 非法. 暂时只支持: {', '.join(valid_bools)}")
+
+    # 验证value等于default
+    if kv_value != default_val_str:
+        _die(kv_line_num, f"key-value对中的 value:{kv_value} 必须等于 comment 中的 default:{default_val_str}")
+
+    min_val = None
+    max_val = None
+
+    return value, default_val, min_val, max_val
+
+
+def _validate_float(kv_value, default_val_str, min_val_str, max_val_str, line_num, kv_line_num):
+    """验证float类型的配置项, 返回(value, default, min, max)"""
+    # 验证value是浮点数
+    try:
+        value = float(kv_value)
+    except ValueError:
+        _die(kv_line_num, _ERR_MSG["value_illegal"])
+
+    # 验证default是浮点数
+    try:
+        default_val = float(default_val_str)
+    except ValueError:
+        _die(kv_line_num, _ERR_MSG["default_illegal"])
+
+    if min_val_str is None or min_val_str == "":
+        _die(kv_line_num, "float类型的 comment 中必须指明min. (标准格式: '; key: type=float, default=..., min=..., max=...')")
+
+    if max_val_str is None or max_val_str == "":
+        _die(kv_line_num, "float类型的 comment 中必须指明max. (标准格式: '; key: type=float, default=..., min=..., max=...')")
+
+    # 验证min是浮点数
+    try:
+        min_val = float(min_val_str)
+    except ValueError:
+        _die(kv_line_num, _ERR_MSG["min_illegal"])
+
+    # 验证max是浮点数
+    try:
+        max_val = float(max_val_str)
+    except ValueError:
+        _die(kv_line_num, _ERR_MSG["max_illegal"])
+
+    # 验证value等于default
+    if kv_value != default_val_str:
+        _die(kv_line_num, f"key-value对中的 value:{kv_value} 必须等于 comment 中的 default:{default_val_str}")
+
+    # 验证范围
+    if default_val < min_val:
+        _die(line_num, f"comment 中的 default:{default_val} 必须 >= min:{min_val}")
+
+    if default_val > max_val:
+        _die(line_num, f"comment 中的 default:{default_val} 必须 <= max:{max_val}")
+
+    return value, default_val, min_val, max_val
+
+
+def _validate_string(data_type, kv_value, default_val_str, line_num, kv_line_num):
+    """验证string:len类型的配置项, 返回(value, default, min, max, len)"""
+    # 提取字符串长度限制（如指定）
+    str_len = None
+    if ":" in data_type:
+        str_len_part = data_type.split(":", 1)[1].strip()
+        try:
+            str_len = int(str_len_part)
+        except ValueError:
+            _die(line_num, "string 类型的comment中所指明的大小非法.")
+    else:
+        _die(line_num, "string 类型的comment中必须要指明大小. 例如: type=string:20")
+
+    # 验证value长度 按UTF-8编码后的字节数计算, 与生成的char数组大小一致
+    value_bytes = len(kv_value.encode("utf-8"))
+    if value_bytes > str_len - 1:
+        _die(kv_line_num, f"key-value对中的 value 过长({value_bytes}字节). comment 中的限制: {str_len} - 1")
+
+    # 验证default长度 同样按字节数计算
+    default_bytes = len(default_val_str.encode("utf-8"))
+    if default_bytes > str_len - 1:
+        _die(line_num, f"comment中的 default value 过长({default_bytes}字节). comment 中的限制: {str_len} - 1")
+
+    # 验证value等于default
+    if kv_value != default_val_str:
+        _die(kv_line_num, f"key-value对中的 value:{kv_value} 必须等于 comment 中的 default:{default_val_str}")
+
+    min_val = None
+    max_val = None
+    value = kv_value
+    default_val = default_val_str
+
+    return value, default_val, min_val, max_val, str_len
+
+
+# 类型 -> 验证函数 (string:len 类型由 _validate_string 单独处理)
+_VALIDATORS = {
+    "int": _validate_int,
+    "bool": _validate_bool,
+    "float": _validate_float,
+}
+
+
+@dataclass(slots=True)
+class _ParseState:
+    """parse_settings_ini的解析状态"""
+
+    # 解析结果, 每个元素是一个Setting
+    settings: list = field(default_factory=list)
+    # 按section分组的配置项, 供各代码生成函数复用
+    sections: defaultdict = field(default_factory=lambda: defaultdict(list))
+    # 已解析的(section, key), 用于查重及查找Verify项
+    seen_keys: set = field(default_factory=set)
+    current_section: str | None = None
+
+
+def _parse_section_line(state, i, lines, line_num, stripped_line):
+    """处理section行(必须是[xxx]格式), 返回下一个待解析行的下标"""
+    line_count = len(lines)
+    section_name = stripped_line[1:-1].strip()
+    if not section_name:
+        _die(line_num, "section 名字不能为空")
+
+    # 验证section名称符合C语言标识符规则
+    if not _is_c_identifier(section_name):
+        _die(line_num, f"section 命名 '{section_name}' 非法. 无法生成对应结构体名称")
+
+    state.current_section = section_name
+    i += 1
+
+    # 检查是否有下一行
+    if i >= line_count:
+        _die(line_num, f"section '{section_name}' 为空, 无法继续解析")
+
+    # 验证section的下一行必须是comment
+    next_line = lines[i]
+    next_stripped = next_line.strip()
+    if not next_stripped.startswith(";"):
+        _die(line_num + 1, "section 中的首行必须为 comment")
+
+    return i
+
+
+def _parse_comment_line(state, i, lines, line_num, stripped_line):
+    """处理comment行(必须紧跟在section或另一个KV之后)及其后的KV行, 返回下一个待解析行的下标"""
+    line_count = len(lines)
+    if state.current_section is None:
+        _die(line_num, "comment 必须要在 section 内部")
+
+    # 提取注释内容
+    comment_content = stripped_line[1:].strip()
+    if not comment_content:
+        _die(line_num, "comment 不可为空")
+
+    # 提取key名称（注释中第一个标识符）
+    if ":" in comment_content:
+        key_part, meta_part = comment_content.split(":", 1)
+        key_name = key_part.strip()
+        meta_part = meta_part.strip()
+    else:
+        _die(line_num, f"comment 无法解析. {_ERR_MSG['comment_format']}")
+
+    if not key_name:
+        _die(line_num, f"comment 无法解析(找不到key). {_ERR_MSG['comment_format']}")
+
+    # 验证key名称符合C语言变量命名规则
+    if not _is_c_identifier(key_name):
+        _die(line_num, f"key 命名 '{key_name}' 非法. 无法生成对应的结构体变量名称.")
+
+    # 同一section中的key不允许重复定义
+    if (state.current_section, key_name) in state.seen_keys:
+        _die(line_num, f"section '{state.current_section}' 中的 key '{key_name}' 重复定义.")
+
+    # 解析元数据部分，提取所有键值对
+    meta_items = []
+    # 分割元数据（处理逗号分隔的情况）
+    for item in _split_meta(meta_part):
+        item = item.strip()
+        if not item:
+            continue
+        if "=" in item:
+            k, v = item.split("=", 1)
+        else:
+            _die(line_num, f"comment 中的元数据无法解析. {_ERR_MSG['comment_format']}")
+        meta_items.append((k.strip().lower(), v.strip()))
+
+    # 构建元数据字典
+    meta = dict(meta_items)
+
+    # 检查必须包含的元数据
+    if "type" not in meta:
+        _die(line_num, "comment中必须指明'type' (标准格式: 'type=value')")
+    if "default" not in meta:
+        _die(line_num, "comment中必须指明'default' (标准格式: 'default=value')")
+
+    # 提取元数据
+    data_type = meta["type"].lower()
+    default_val_str = meta["default"]
+    is_string = data_type == "string" or data_type.startswith("string:")
+
+    # 验证类型是否支持
+    supported_types = [
+        "int",
+        "bool",
+        "float",
+        "string",
+    ]
+    if not is_string and data_type not in supported_types:
+        _die(line_num, f"key:'{key_name} 具有不支持的类型 '{data_type}''. 暂时只支持: {', '.join(supported_types)}, string:len")
+
+    # 检查bool和string的comment中是否存在不允许的元数据（min/max）
+    # 即使值为空也不允许存在
+    if is_string or data_type == "bool":
+        if "min" in meta:
+            _die(line_num, f"{data_type} 类型的comment中不允许出现 'min'")
+        if "max" in meta:
+            _die(line_num, f"{data_type} 类型的comment中不允许出现 'max'")
+
+    # 提取min和max（如存在）
+    min_val_str = meta.get("min")
+    max_val_str = meta.get("max")
+
+    # 检查下一行是否为KV行
+    if i + 1 >= line_count:
+        _die(line_num, _ERR_MSG["kv_required"])
+
+    # 3. 处理KV行
+    kv_line = lines[i + 1]
+    kv_line_num = i + 2
+    kv_stripped = kv_line.strip()
+
+    # 验证KV行格式严格为xxx=xxx
+    if "=" not in kv_stripped:
+        _die(kv_line_num, _ERR_MSG["kv_required"])
+
+    # 确保只有一个'='
+    if kv_stripped.count("=") > 1:
+        _die(kv_line_num, "key-value对 中只能有1个 '='")
+
+    kv_parts = kv_stripped.split("=", 1)
+    kv_key = kv_parts[0].strip()
+    kv_value = kv_parts[1].strip()
+
+    # 验证KV的key与注释中的key一致
+    if kv_key != key_name:
+        _die(kv_line_num, "key-value对中的key 与 comment中的key名称不匹配")
+
+    # 验证value不为空
+    if not kv_value:
+        _die(kv_line_num, "key-value对中的 value 不能为空")
+
+    # 根据类型验证所有值
+    str_len = None
+    try:
+        if is_string:
+            value, default_val, min_val, max_val, str_len = _validate_string(
+                data_type, kv_value, default_val_str, line_num, kv_line_num
+            )
+        else:
+            value, default_val, min_val, max_val = _VALIDATORS[data_type](
+                kv_value, default_val_str, min_val_str, max_val_str, line_num, kv_line_num
+            )
+    except ValueError as e:
+        _die(line_num if 'default' in str(e).lower() else kv_line_num, f"{data_type} 出现非法值 - {str(e)} (key '{kv_key}')")
+
+    # 存储解析结果
+    item = Setting(
+        section=state.current_section,
+        key=kv_key,
+        value=value,
+        default=default_val,
+        type=data_type,
+        min=min_val,
+        max=max_val,
+        comment=comment_content,
+        comment_line=line_num,
+        kv_line=kv_line_num,
+        str_len=str_len,
+    )
+    state.settings.append(item)
+    state.sections[state.current_section].append(item)
+    state.seen_keys.add((state.current_section, kv_key))
+
+    # 移动到下一行（KV行的下一行）
+    i += 2
+
+    # 4. 处理可能的空行（表示section结束）
+    if i < line_count:
+        next_line = lines[i]
+        next_line_num = i + 1
+        next_stripped = next_line.strip()
 
+        if not next_stripped:  # 空行
+            # 空行后必须是新的section
+            i += 1  # 跳过空行
+
+            if i >= line_count:
+                _die(next_line_num, _ERR_MSG["section_after_blank"])
+
+            # 检查空行后的行是否为section
+            section_line = lines[i]
+            section_line_num = i + 1
+            section_stripped = section_line.strip()
+
+            if not (
+                section_stripped.startswith("[")
+                and section_stripped.endswith("]")
+            ):
+                _die(section_line_num, _ERR_MSG["section_after_blank"])
+
+    return i
+
+
+def _parse_line(state, i, lines):
+    """解析第i行(下标从0开始), 返回下一个待解析行的下标"""
+    line_num = i + 1
+    stripped_line = lines[i].strip()
+
+    # 1. 处理section行
+    if stripped_line.startswith("[") and stripped_line.endswith("]"):
+        return _parse_section_line(state, i, lines, line_num, stripped_line)
+
+    # 2. 处理comment行
+    if stripped_line.startswith(";"):
+        return _parse_comment_line(state, i, lines, line_num, stripped_line)
+
+    # 如果不是section、comment或空行，就是无效行
+    _die(line_num, "Invalid content. Expected section, comment, or empty line (only between sections)")
+
+
+# 这里刻意手写逐行解析而不使用configparser: configparser会丢弃注释,
+# 而配置项的类型/默认值/范围等元数据都写在注释中, 且需要保留行号用于报错
 def parse_settings_ini(ini_path):
     """按行解析settings.ini文件，严格遵循指定的格式流程和注释格式规则"""
     try:
-        with open(ini_path, "r") as f:
-            # 读取所有行并记录行号（从1开始）
-            lines = [(i + 1, line.rstrip("\n")) for i, line in enumerate(f.readlines())]
+        # 一次性读取整个文件并按行切分, 行号由下标计算(从1开始)
+        lines = Path(ini_path).read_text().splitlines()
     except Exception as e:
-        print(f"读取 INI 文件时发生错误: {e}", file=sys.stderr)
-        sys.exit(1)
+        _die_raw(f"读取 INI 文件时发生错误: {e}")
 
-    settings = []  # 用Python列表存储解析结果，每个元素是一个配置项字典
-    current_section = None
+    state = _ParseState()
     i = 0
     line_count = len(lines)
 
     # 第一行必须是section
     if line_count == 0:
-        print("错误: INI 文件为空", file=sys.stderr)
-        sys.exit(1)
+        _die_raw("错误: INI 文件为空")
 
-    line_num, line = lines[0]
-    stripped_line = line.strip()
+    stripped_line = lines[0].strip()
     if not (stripped_line.startswith("[") and stripped_line.endswith("]")):
-        print(
-            f'第 1 行格式错误: 必须为某个section, 格式为 "[section_name]"',
-            file=sys.stderr,
-        )
-        sys.exit(1)
+        _die(1, '必须为某个section, 格式为 "[section_name]"')
 
     # 开始逐行解析
     while i < line_count:
-        line_num, line = lines[i]
-        stripped_line = line.strip()
-
-        # 1. 处理section行（必须是[xxx]格式）
-        if stripped_line.startswith("[") and stripped_line.endswith("]"):
-            section_name = stripped_line[1:-1].strip()
-            if not section_name:
-                print(
-                    f"第 {line_num} 行格式错误: section 名字不能为空",
-                    file=sys.stderr,
-                )
-                sys.exit(1)
-
-            # 验证section名称符合C语言标识符规则
-            if not re.match(r"^[a-zA-Z_][a-zA-Z0-9_]*$", section_name):
-                print(
-                    f"第 {line_num} 行格式错误: section 命名 '{section_name}' 非法. 无法生成对应结构体名称",
-                    file=sys.stderr,
-                )
-                sys.exit(1)
-
-            current_section = section_name
-            i += 1
-
-            # 检查是否有下一行
-            if i >= line_count:
-                print(
-                    f"第 {line_num} 行格式错误: section '{section_name}' 为空, 无法继续解析",
-                    file=sys.stderr,
-                )
-                sys.exit(1)
-
-            # 验证section的下一行必须是comment
-            next_line_num, next_line = lines[i]
-            next_stripped = next_line.strip()
-            if not next_stripped.startswith(";"):
-                print(
-                    f"第 {line_num + 1} 行格式错误: section 中的首行必须为 comment",
-                    file=sys.stderr,
-                )
-                sys.exit(1)
-
-            continue
-
-        # 2. 处理comment行（必须紧跟在section或另一个KV之后）
-        if stripped_line.startswith(";"):
-            if current_section is None:
-                print(
-                    f"第 {line_num} 行格式错误: comment 必须要在 section 内部",
-                    file=sys.stderr,
-                )
-                sys.exit(1)
-
-            # 提取注释内容
-            comment_content = stripped_line[1:].strip()
-            if not comment_content:
-                print(
-                    f"第 {line_num} 行格式错误: comment 不可为空",
-                    file=sys.stderr,
-                )
-                sys.exit(1)
-
-            # 提取key名称（注释中第一个标识符）
-            if ":" in comment_content:
-                key_part, meta_part = comment_content.split(":", 1)
-                key_name = key_part.strip()
-                meta_part = meta_part.strip()
-            else:
-                print(
-                    f"第 {line_num} 行格式错误: comment 无法解析. (标准格式: '; key: type=..., default=..., min=..., max=...' 或 '; key: type=..., default=...')",
-                    file=sys.stderr,
-                )
-                sys.exit(1)
-
-            if not key_name:
-                print(
-                    f"第 {line_num} 行格式错误: comment 无法解析(找不到key). (标准格式: '; key: type=..., default=..., min=..., max=...' 或 '; key: type=..., default=...')",
-                    file=sys.stderr,
-                )
-                sys.exit(1)
-
-            # 验证key名称符合C语言变量命名规则
-            if not re.match(r"^[a-zA-Z_][a-zA-Z0-9_]*$", key_name):
-                print(
-                    f"第 {line_num} 行格式错误: key 命名 '{key_name}' 非法. 无法生成对应的结构体变量名称.",
-                    file=sys.stderr,
-                )
-                sys.exit(1)
-
-            # 解析元数据部分，提取所有键值对
-            meta_items = []
-            # 分割元数据（处理逗号分隔的情况）
-            for item in re.split(r",(?=\s*[a-zA-Z]+[:=])", meta_part):
-                item = item.strip()
-                if not item:
-                    continue
-                if "=" in item:
-                    k, v = item.split("=", 1)
-                else:
-                    print(
-                        f" {line_num} 行格式错误. (标准格式: '; key: type=..., default=..., min=..., max=...' 或 '; key: type=..., default=...')"
-                    )
-                    sys.exit(1)
-                meta_items.append((k.strip().lower(), v.strip()))
-
-            # 构建元数据字典
-            meta = dict(meta_items)
-
-            # 检查必须包含的元数据
-            required_meta = ["type", "default"]
-            for req in required_meta:
-                if req not in meta:
-                    print(
-                        f"第 {line_num} 行格式错误: comment中必须指明'{req}' (标准格式: '{req}=value')",
-                        file=sys.stderr,
-                    )
-                    sys.exit(1)
-
-            # 提取元数据
-            data_type = meta["type"].lower()
-            default_val_str = meta["default"]
-
-            # 验证类型是否支持
-            supported_types = [
-                "int",
-                "bool",
-                "float",
-                "string",
-            ]
-            if data_type not in supported_types and not data_type.startswith("string:"):
-                print(
-                    f"第 {line_num} 行格式错误: key:'{key_name} 具有不支持的类型 '{data_type}''. 暂时只支持: {', '.join(supported_types)}, string:len",
-                    file=sys.stderr,
-                )
-                sys.exit(1)
-
-            # 检查bool和string的comment中是否存在不允许的元数据（min/max）
-            disallowed_meta = []
-            if data_type in ["bool", "string"] or data_type.startswith("string:"):
-                disallowed_meta = ["min", "max"]
-
-            # 检查是否有不允许的元数据
-            for meta_key in disallowed_meta:
-                if meta_key in meta:
-                    # 即使值为空也不允许存在
-                    print(
-                        f"第 {line_num} 行格式错误: {data_type} 类型的comment中不允许出现 '{meta_key}'",
-                        file=sys.stderr,
-                    )
-                    sys.exit(1)
-
-            # 提取允许的min和max（如存在）
-            min_val_str = meta.get("min") if data_type not in disallowed_meta else None
-            max_val_str = meta.get("max") if data_type not in disallowed_meta else None
-
-            # 检查下一行是否为KV行
-            if i + 1 >= line_count:
-                print(
-                    f"第 {line_num} 行格式错误: comment 的下一行必须是 key-value对",
-                    file=sys.stderr,
-                )
-                sys.exit(1)
-
-            # 3. 处理KV行
-            kv_line_num, kv_line = lines[i + 1]
-            kv_stripped = kv_line.strip()
-
-            # 验证KV行格式严格为xxx=xxx
-            if "=" not in kv_stripped:
-                print(
-                    f"第 {kv_line_num} 行格式错误: comment 的下一行必须是 key-value对",
-                    file=sys.stderr,
-                )
-                sys.exit(1)
-
-            # 确保只有一个'='
-            if kv_stripped.count("=") > 1:
-                print(
-                    f"第 {kv_line_num} 行格式错误: key-value对 中只能有1个 '='",
-                    file=sys.stderr,
-                )
-                sys.exit(1)
-
-            kv_parts = kv_stripped.split("=", 1)
-            kv_key = kv_parts[0].strip()
-            kv_value = kv_parts[1].strip()
-
-            # 验证KV的key与注释中的key一致
-            if kv_key != key_name:
-                print(
-                    f"第 {kv_line_num} 行格式错误: key-value对中的key 与 comment中的key名称不匹配",
-                    file=sys.stderr,
-                )
-                sys.exit(1)
-
-            # 验证value不为空
-            if not kv_value:
-                print(
-                    f"第 {kv_line_num} 行格式错误: key-value对中的 value 不能为空",
-                    file=sys.stderr,
-                )
-                sys.exit(1)
-
-            # 根据类型验证所有值
-            try:
-                # 整数类型验证
-                if data_type == "int":
-                    # 验证value是整数
-                    try:
-                        value = int(kv_value)
-                    except ValueError:
-                        print(
-                            f"第 {kv_line_num} 行格式错误: key-value对中的 value 值非法.",
-                            file=sys.stderr,
-                        )
-                        sys.exit(1)
-
-                    # 验证default是整数
-                    try:
-                        default_val = int(default_val_str)
-                    except ValueError:
-                        print(
-                            f"第 {kv_line_num} 行格式错误: comment 中的default值非法.",
-                            file=sys.stderr,
-                        )
-                        sys.exit(1)
-
-                    if min_val_str is None or min_val_str == "":
-                        print(
-                            f"第 {kv_line_num} 行格式错误: int类型的 comment 中必须指明min. (标准格式: '; key: type=int, default=..., min=..., max=...')",
-                            file=sys.stderr,
-                        )
-                        sys.exit(1)
-
-                    if max_val_str is None or max_val_str == "":
-                        print(
-                            f"第 {kv_line_num} 行格式错误: int类型的 comment 中必须指明max. (标准格式: '; key: type=int, default=..., min=..., max=...')",
-                            file=sys.stderr,
-                        )
-                        sys.exit(1)
-
-                    # 验证min是整数
-                    try:
-                        min_val = int(min_val_str)
-                    except ValueError:
-                        print(
-                            f"第 {kv_line_num} 行格式错误: comment 中的min值非法.",
-                            file=sys.stderr,
-                        )
-                        sys.exit(1)
-
-                    # 验证max是整数（如存在）
-                    try:
-                        max_val = int(max_val_str)
-                    except ValueError:
-                        print(
-                            f"第 {kv_line_num} 行格式错误: comment 中的max值非法.",
-                            file=sys.stderr,
-                        )
-                        sys.exit(1)
-
-                    # 验证value等于default
-                    if value != default_val:
-                        print(
-                            f"第 {kv_line_num} 行格式错误: key-value对中的 value:{value} 必须等于 comment 中的 default:{default_val}",
-                            file=sys.stderr,
-                        )
-                        sys.exit(1)
-
-                    # 验证范围
-                    if default_val < min_val:
-                        print(
-                            f"第 {line_num} 行格式错误: comment 中的 default:{default_val} 必须 >= min:{min_val}",
-                            file=sys.stderr,
-                        )
-                        sys.exit(1)
-
-                    if default_val > max_val:
-                        print(
-                            f"第 {line_num} 行格式错误: comment 中的 default:{default_val} 必须 <= max:{max_val}",
-                            file=sys.stderr,
-                        )
-                        sys.exit(1)
-
-                # 布尔类型验证
-                elif data_type == "bool":
-                    valid_bools = ["true", "false"]
-
-                    value = kv_value
-                    default_val = default_val_str
-
-                    # 验证value是有效的布尔值
-                    if kv_value not in valid_bools:
-                        print(
-                            f"第 {kv_line_num} 行格式错误: key-value对中的 value:{kv_value} 非法. 暂时只支持: {', '.join(valid_bools)}",
-                            file=sys.stderr,
-                        )
-                        sys.exit(1)
-
-                    # 验证default是有效的布尔值
-                    if default_val_str not in valid_bools:
-                        print(
-                            f"第 {line_num} 行格式错误: comment中的 default:{default_val_str} 非法. 暂时只支持: {', '.join(valid_bools)}",
-                            file=sys.stderr,
-                        )
-                        sys.exit(1)
-
-                    # 验证value等于default
-                    if kv_value != default_val_str:
-                        print(
-                            f"第 {kv_line_num} 行格式错误: key-value对中的 value:{kv_value} 必须等于 comment 中的 default:{default_val_str}",
-                            file=sys.stderr,
-                        )
-                        sys.exit(1)
-
-                    min_val = None
-                    max_val = None
-
-                # 浮点类型验证
-                elif data_type in ["float"]:
-                    # 验证value是浮点数
-                    try:
-                        value = float(kv_value)
-                    except ValueError:
-                        print(
-                            f"第 {kv_line_num} 行格式错误: key-value对中的 value 值非法.",
-                            file=sys.stderr,
-                        )
-                        sys.exit(1)
-
-                    # 验证default是浮点数
-                    try:
-                        default_val = float(default_val_str)
-                    except ValueError:
-                        print(
-                            f"第 {kv_line_num} 行格式错误: comment 中的default值非法.",
-                            file=sys.stderr,
-                        )
-                        sys.exit(1)
-
-                    if min_val_str is None or min_val_str == "":
-                        print(
-                            f"第 {kv_line_num} 行格式错误: float类型的 comment 中必须指明min. (标准格式: '; key: type=float, default=..., min=..., max=...')",
-                            file=sys.stderr,
-                        )
-                        sys.exit(1)
-
-                    if max_val_str is None or max_val_str == "":
-                        print(
-                            f"第 {kv_line_num} 行格式错误: float类型的 comment 中必须指明max. (标准格式: '; key: type=float, default=..., min=..., max=...')",
-                            file=sys.stderr,
-                        )
-                        sys.exit(1)
-
-                    # 验证min是浮点数
-                    try:
-                        min_val = float(min_val_str)
-                    except ValueError:
-                        print(
-                            f"第 {kv_line_num} 行格式错误: comment 中的min值非法.",
-                            file=sys.stderr,
-                        )
-                        sys.exit(1)
-
-                    # 验证max是浮点数
-                    try:
-                        max_val = float(max_val_str)
-                    except ValueError:
-                        print(
-                            f"第 {kv_line_num} 行格式错误: comment 中的max值非法.",
-                            file=sys.stderr,
-                        )
-                        sys.exit(1)
-
-                    # 验证value等于default
-                    if kv_value != default_val_str:
-                        print(
-                            f"第 {kv_line_num} 行格式错误: key-value对中的 value:{kv_value} 必须等于 comment 中的 default:{default_val_str}",
-                            file=sys.stderr,
-                        )
-                        sys.exit(1)
-
-                    # 验证范围
-                    if default_val < min_val:
-                        print(
-                            f"第 {line_num} 行格式错误: comment 中的 default:{default_val} 必须 >= min:{min_val}",
-                            file=sys.stderr,
-                        )
-                        sys.exit(1)
-
-                    if default_val > max_val:
-                        print(
-                            f"第 {line_num} 行格式错误: comment 中的 default:{default_val} 必须 <= max:{max_val}",
-                            file=sys.stderr,
-                        )
-                        sys.exit(1)
-
-                # 字符串类型验证
-                elif data_type in ["string"] or data_type.startswith("string:"):
-                    # 提取字符串长度限制（如指定）
-                    str_len = None
-                    if ":" in data_type:
-                        str_len_part = data_type.split(":", 1)[1].strip()
-                        try:
-                            str_len = int(str_len_part)
-                        except ValueError:
-                            print(
-                                f"第 {line_num} 行格式错误: string 类型的comment中所指明的大小非法.",
-                                file=sys.stderr,
-                            )
-                            sys.exit(1)
-                    else:
-                        print(
-                            f"第 {line_num} 行格式错误: string 类型的comment中必须要指明大小. 例如: type=string:20",
-                            file=sys.stderr,
-                        )
-                        sys.exit(1)
-
-                    # 验证value长度
-                    if len(kv_value) > str_len - 1:
-                        print(
-                            f"第 {kv_line_num} 行格式错误: key-value对中的 value 过长({len(kv_value)}). comment 中的限制: {str_len} - 1",
-                            file=sys.stderr,
-                        )
-                        sys.exit(1)
-
-                    # 验证default长度
-                    if len(default_val_str) > str_len - 1:
-                        print(
-                            f"第 {line_num} 行格式错误: comment中的 default value 过长({len(default_val_str)}). comment 中的限制: {str_len} - 1",
-                            file=sys.stderr,
-                        )
-                        sys.exit(1)
-
-                    # 验证value等于default
-                    if kv_value != default_val_str:
-                        print(
-                            f"第 {kv_line_num} 行格式错误: key-value对中的 value:{value} 必须等于 comment 中的 default:{default_val}",
-                            file=sys.stderr,
-                        )
-                        sys.exit(1)
-
-                    min_val = None
-                    max_val = None
-                    value = kv_value
-                    default_val = default_val_str
-
-            except ValueError as e:
-                print(
-                    f"第 {line_num if 'default' in str(e).lower() else kv_line_num} 行格式错误: {data_type} 出现非法值 - {str(e)} (key '{kv_key}')",
-                    file=sys.stderr,
-                )
-                sys.exit(1)
-
-            # 存储解析结果
-            settings.append(
-                {
-                    "section": current_section,
-                    "key": kv_key,
-                    "value": value,
-                    "default": default_val,
-                    "type": data_type,
-                    "min": min_val,
-                    "max": max_val,
-                    "comment": comment_content,
-                    "comment_line": line_num,
-                    "kv_line": kv_line_num,
-                }
-            )
-
-            # 移动到下一行（KV行的下一行）
-            i += 2
-
-            # 4. 处理可能的空行（表示section结束）
-            if i < line_count:
-                next_line_num, next_line = lines[i]
-                next_stripped = next_line.strip()
-
-                if not next_stripped:  # 空行
-                    # 空行后必须是新的section
-                    i += 1  # 跳过空行
-
-                    if i >= line_count:
-                        print(
-                            f"第 {next_line_num} 行格式错误: 空行后面必须是一个新的 section",
-                            file=sys.stderr,
-                        )
-                        sys.exit(1)
-
-                    # 检查空行后的行是否为section
-                    section_line_num, section_line = lines[i]
-                    section_stripped = section_line.strip()
-
-                    if not (
-                        section_stripped.startswith("[")
-                        and section_stripped.endswith("]")
-                    ):
-                        print(
-                            f"第 {section_line_num} 行格式错误: 空行后面必须是一个新的 section",
-                            file=sys.stderr,
-                        )
-                        sys.exit(1)
-
-            continue
-
-        # 如果不是section、comment或空行，就是无效行
-        print(
-            f"第 {line_num} 行格式错误: Invalid content. Expected section, comment, or empty line (only between sections)",
-            file=sys.stderr,
-        )
-        sys.exit(1)
+        i = _parse_line(state, i, lines)
 
     # 验证至少有一个配置项
-    if not settings:
-        print("错误: 未从 INI 文件中解析出任何配置项", file=sys.stderr)
-        sys.exit(1)
+    if not state.settings:
+        _die_raw("错误: 未从 INI 文件中解析出任何配置项")
 
-    have_verify = False
-    for item in settings:
-        if item["section"] == "Verify" and item["key"] == "crc_16_ibm":
-            have_verify = True
-    if have_verify == False:
-        print("错误: INI 文件中缺少Verify.crc_16_ibm项, 无法进行校验", file=sys.stderr)
-        sys.exit(1)
-    return settings
+    if ("Verify", "crc_16_ibm") not in state.seen_keys:
+        _die_raw("错误: INI 文件中缺少Verify.crc_16_ibm项, 无法进行校验")
+    return state.settings, dict(state.sections)
 
+# settings_persist.h的模板, 其中${struct_body}和${setter_decls}由生成函数填充
+_HEADER_TMPL_PATH = Path(__file__).parent / "templates" / "settings.h.tmpl"
 
-def generate_settings_persist_header(settings):
-    """生成settings.h文件，包含配置结构体定义，带min/max注释"""
-    code = "#ifndef _SETTINGS_PERSIST_H\n"
-    code += "#define _SETTINGS_PERSIST_H\n\n"
-    code += "#include <stdbool.h>\n"
-    code += "#include <stdint.h>\n"
-    code += "#include <string.h>\n\n"
-    code += "typedef struct\n"
-    code += "{\n"
-
-    # 按section分组
-    sections = {}
-    for item in settings:
-        section = item["section"]
-        if section not in sections:
-            sections[section] = []
-        sections[section].append(item)
 
-    # 为每个section生成嵌套结构体
+def generate_settings_persist_header(sections):
+    """生成settings.h文件，包含配置结构体定义，带min/max注释"""
+    # 为每个section生成嵌套结构体(写入C实现的StringIO, 避免反复拼接字符串)
+    struct_body = io.StringIO()
+    w = struct_body.write
     for section, items in sections.items():
-        code += f"    /* {section} settings */\n"
-        code += "    struct\n"
-        code += "    {\n"
+        w(f"    /* {section} settings */\n")
+        w("    struct\n")
+        w("    {\n")
 
         for item in items:
+            is_string = item.type.startswith("string")
             # 定义C变量类型
-            if item["type"] == "int":
-                c_type = f"int {item['key']}"
-            elif item["type"] == "bool":
-                c_type = f"bool {item['key']}"
-            elif item["type"] == "float":
-                c_type = f"float {item['key']}"
-            elif item["type"].startswith("string"):
+            if item.type == "int":
+                c_type = f"int {item.key}"
+            elif item.type == "bool":
+                c_type = f"bool {item.key}"
+            elif item.type == "float":
+                c_type = f"float {item.key}"
+            elif is_string:
                 # 处理带长度的字符串
-                match = re.search(r"string:(\d+)", item["type"])
-                if match:
-                    c_type = f"char {item['key']}[{match.group(1)}]"
-                else:
-                    c_type = f"char {item['key']}[64]"  # 默认长度
+                c_type = f"char {item.key}[{item.str_len}]"
             else:
-                c_type = f"char {item['key']}[64]"  # 默认为字符串
+                c_type = f"char {item.key}[64]"  # 默认为字符串
 
             # 构建注释内容
-            if item["type"].startswith("string"):
+            if is_string:
                 # 字符串类型：带引号的默认值
-                comment = f'/* default: "{item["default"]}" */'
+                comment = f'/* default: "{item.default}" */'
             else:
                 # 数值类型：包含默认值、min和max
-                comment_parts = [f"default: {item['default']}"]
-                if "min" in item and item["min"] is not None:
-                    comment_parts.append(f"min: {item['min']}")
-                if "max" in item and item["max"] is not None:
-                    comment_parts.append(f"max: {item['max']}")
+                comment_parts = [f"default: {item.default}"]
+                if item.min is not None:
+                    comment_parts.append(f"min: {item.min}")
+                if item.max is not None:
+                    comment_parts.append(f"max: {item.max}")
                 comment = f"/* {', '.join(comment_parts)} */"
 
-            code += f"        {c_type};  {comment}\n"
-
-        code += f"    }} {section};\n\n"
+            w(f"        {c_type};  {comment}\n")
 
-    code += "} Settings;\n\n"
-
-    code += "int settings_persist_init(void);\n\n"
-    code += "int settings_persist_get_data(Settings *settings);\n\n"
-    code += "int settings_persist_set_data(const Settings *settings);\n\n"
-    code += "int settings_persist_reset_all_data(void);\n\n"
+        w(f"    }} {section};\n\n")
 
     # 生成setter函数声明
+    setter_decls = io.StringIO()
+    w = setter_decls.write
+    decl_fmt = "int settings_persist_set_{0}_{1}({2} {1});\n\n".format
     for section, items in sections.items():
         for item in items:
             # 跳过不需要生成setter的项：section为"Verify"且key为"crc_16_ibm"
-            if section == "Verify" and item["key"] == "crc_16_ibm":
+            if section == "Verify" and item.key == "crc_16_ibm":
                 continue
             # 确定参数类型
-            if item["type"] == "int":
+            if item.type == "int":
                 param_type = "int"
-            elif item["type"] == "bool":
+            elif item.type == "bool":
                 param_type = "bool"
-            elif item["type"] == "float":
+            elif item.type == "float":
                 param_type = "float"
-            elif item["type"].startswith("string"):
-                param_type = "const char*"
             else:
+                # string类型
                 param_type = "const char*"
             # 生成函数声明
-            func_name = f"settings_persist_set_{section}_{item['key']}"
-            code += f"int {func_name}({param_type} {item['key']});\n\n"
+            w(decl_fmt(section, item.key, param_type))
 
-    code += "int settings_persist_deinit(void);\n\n"
-    code += "#endif /* _SETTINGS_PERSIST_H */\n"
-    return code
+    return Template(_HEADER_TMPL_PATH.read_text()).safe_substitute(
+        struct_body=struct_body.getvalue(), setter_decls=setter_decls.getvalue()
+    )
 
 
-def generate_settings_set_functions(settings):
-    """生成所有配置项的setter函数代码"""
-    code = """
+# setter函数模板, 每个配置项只需填充一次
+_SETTER_TMPL = """int {func_name}({param_type} {param_name})
+{{
+    SETTINGS_PERSIST_SET_FUNC_LOG_TAG("{func_name}");
+{validation}
+    pthread_mutex_lock(&settings_persist_thread_status_mutex);
+    if (settings_persist_thread_running == 0)
+    {{
+        SETTINGS_PERSIST_LOG_WARN("数据更新失败: settings_persist模块未初始化");
+        pthread_mutex_unlock(&settings_persist_thread_status_mutex);
+        return -2;
+    }}
+
+    pthread_mutex_lock(&cache_mutex);
+    {assignment}
+    pthread_mutex_unlock(&cache_mutex);
+    SETTINGS_PERSIST_LOG_DEBUG("数据更新成功");
+    pthread_mutex_unlock(&settings_persist_thread_status_mutex);
+    return 0;
+}}
+"""
+
+# setter函数中数值类型的范围检查模板
+_SETTER_RANGE_CHECK_TMPL = """    if ({param_name} > {max} || {param_name} < {min})
+    {{
+        SETTINGS_PERSIST_LOG_WARN("参数值超出范围: {min}~{max}");
+        return -1;
+    }}
+"""
+
+# setter函数中字符串类型的长度检查模板
+_SETTER_STRLEN_CHECK_TMPL = """    if (strlen({param_name}) > {max_len})
+    {{
+        SETTINGS_PERSIST_LOG_WARN("字符串过长 最大长度为{max_len}");
+        return -1;
+    }}
+"""
+
+
+def _build_setter_validation(item, param_name):
+    """生成setter函数的参数验证代码"""
+    if item.type in ("int", "float"):
+        # 数值类型验证min和max
+        if item.min is not None and item.max is not None:
+            return _SETTER_RANGE_CHECK_TMPL.format(
+                param_name=param_name, min=item.min, max=item.max
+            )
+    elif item.type.startswith("string"):
+        # 字符串类型验证长度
+        max_len = item.str_len - 1  # 留一个字节给终止符
+        return _SETTER_STRLEN_CHECK_TMPL.format(param_name=param_name, max_len=max_len)
+    return ""
+
+
+def _build_setter_assignment(item, section, param_name):
+    """生成setter函数中更新缓存的赋值语句"""
+    if item.type.startswith("string"):
+        # 交给settings_copy_string()拷贝, setter内不引入与INI中的key可能重名的局部变量
+        member = f"settings_cache.{section}.{param_name}"
+        return f"settings_copy_string({member}, sizeof({member}), {param_name});"
+    # 其他类型直接赋值
+    return f"settings_cache.{section}.{param_name} = {param_name};"
+
+
+def generate_settings_set_functions(sections):
+    """生成所有配置项的setter函数代码(逐段产出)"""
+    yield """
 extern int settings_persist_thread_running;
 extern pthread_mutex_t settings_persist_thread_status_mutex;
 extern Settings settings_cache;
 extern pthread_mutex_t cache_mutex;
 
-"""
+/**
+ * @brief 将字符串拷贝到定长数组中, 超出部分截断, 尾部全部清零(含结尾'\\0')
+ *        CRC按整个Settings结构体计算, 缩短后的字符串不能残留旧内容
+ *
+ * @param[out] dst 目标数组
+ * @param[in] dst_size 目标数组的大小
+ * @param[in] src 源字符串
+ */
+static inline void settings_copy_string(char* dst, size_t dst_size, const char* src)
+{
+    size_t len = strnlen(src, dst_size - 1);
+    memcpy(dst, src, len);
+    memset(dst + len, 0, dst_size - len);
+}
 
-    # 按section分组
-    sections = {}
-    for item in settings:
-        section = item["section"]
-        if section not in sections:
-            sections[section] = []
-        sections[section].append(item)
+"""
 
-    # 为每个配置项生成setter函数
+    # 为每个配置项生成setter函数, 模板的format_map只需绑定一次
+    render_setter = _SETTER_TMPL.format_map
     for section, items in sections.items():
         for item in items:
             # 跳过Verify部分的crc_16_ibm配置项
-            if section == "Verify" and item["key"] == "crc_16_ibm":
+            if section == "Verify" and item.key == "crc_16_ibm":
                 continue  # 不生成该配置项的setter函数
             # 确定参数类型
-            if item["type"] == "int":
+            if item.type == "int":
                 param_type = "int"
-            elif item["type"] == "bool":
+            elif item.type == "bool":
                 param_type = "bool"
-            elif item["type"] == "float":
+            elif item.type == "float":
                 param_type = "float"
-            elif item["type"].startswith("string"):
-                param_type = "const char*"
             else:
+                # string类型
                 param_type = "const char*"
 
-            param_name = item["key"]
-            func_name = f"settings_persist_set_{section}_{param_name}"
-
-            # 函数开头
-            func_code = f"int {func_name}({param_type} {param_name})\n"
-            func_code += "{\n"
-            func_code += f'    SETTINGS_PERSIST_SET_FUNC_LOG_TAG("{func_name}");\n'
-
-            # 生成参数验证代码
-            validation_code = ""
-            if item["type"] == "int":
-                # 整数类型验证min和max
-                if (
-                    "min" in item
-                    and item["min"] is not None
-                    and "max" in item
-                    and item["max"] is not None
-                ):
-                    validation_code += f"    if ({param_name} > {item['max']} || {param_name} < {item['min']})\n"
-                    validation_code += "    {\n"
-                    validation_code += f"        SETTINGS_PERSIST_LOG_WARN(\"参数值超出范围: {item['min']}~{item['max']}\");\n"
-                    validation_code += "        return -1;\n"
-                    validation_code += "    }\n"
-
-            elif item["type"] == "float":
-                # 浮点类型验证min和max
-                if (
-                    "min" in item
-                    and item["min"] is not None
-                    and "max" in item
-                    and item["max"] is not None
-                ):
-                    validation_code += f"    if ({param_name} > {item['max']} || {param_name} < {item['min']})\n"
-                    validation_code += "    {\n"
-                    validation_code += f"        SETTINGS_PERSIST_LOG_WARN(\"参数值超出范围: {item['min']}~{item['max']}\");\n"
-                    validation_code += "        return -1;\n"
-                    validation_code += "    }\n"
-
-            elif item["type"].startswith("string"):
-                # 字符串类型验证长度
-                match = re.search(r"string:(\d+)", item["type"])
-                if match:
-                    max_len = int(match.group(1)) - 1  # 留一个字节给终止符
-                    validation_code += f"    if (strlen({param_name}) > {max_len})\n"
-                    validation_code += "    {\n"
-                    validation_code += f'        SETTINGS_PERSIST_LOG_WARN("字符串过长 最大长度为{max_len}");\n'
-                    validation_code += "        return -1;\n"
-                    validation_code += "    }\n"
-
-            # 添加验证代码
-            if validation_code:
-                func_code += validation_code
-
-            # 线程安全检查和数据更新
-            func_code += (
-                "\n    pthread_mutex_lock(&settings_persist_thread_status_mutex);\n"
-            )
-            func_code += "    if (settings_persist_thread_running == 0)\n"
-            func_code += "    {\n"
-            func_code += '        SETTINGS_PERSIST_LOG_WARN("数据更新失败: settings_persist模块未初始化");\n'
-            func_code += (
-                "        pthread_mutex_unlock(&settings_persist_thread_status_mutex);\n"
+            param_name = item.key
+            yield render_setter(
+                {
+                    "func_name": f"settings_persist_set_{section}_{param_name}",
+                    "param_type": param_type,
+                    "param_name": param_name,
+                    "validation": _build_setter_validation(item, param_name),
+                    "assignment": _build_setter_assignment(item, section, param_name),
+                }
             )
-            func_code += "        return -2;\n"
-            func_code += "    }\n\n"
 
-            # 数据更新逻辑
-            func_code += "    pthread_mutex_lock(&cache_mutex);\n"
 
-            # 根据类型生成不同的赋值语句
-            if item["type"].startswith("string"):
-                # 字符串需要用strcpy
-                func_code += f"    strcpy(settings_cache.{section}.{param_name}, {param_name});\n"
-            else:
-                # 其他类型直接赋值
-                func_code += (
-                    f"    settings_cache.{section}.{param_name} = {param_name};\n"
-                )
-
-            # 函数结尾
-            func_code += "    pthread_mutex_unlock(&cache_mutex);\n"
-            func_code += '    SETTINGS_PERSIST_LOG_DEBUG("数据更新成功");\n'
-            func_code += (
-                "    pthread_mutex_unlock(&settings_persist_thread_status_mutex);\n"
-            )
-            func_code += "    return 0;\n"
-            func_code += "}"
+# ini_handler前输出的数值解析辅助函数: INI中的值都是ASCII十进制短串, 无需libc的locale/进制处理
+_INI_PARSE_HELPERS = """/*
+ * 分支预测与冷热路径提示: 解析/保存时出错属于极少数情况
+ * 非GCC/Clang编译器下均退化为空, 不影响语义
+ */
+#if defined(__GNUC__)
+#define SP_LIKELY(x) __builtin_expect(!!(x), 1)
+#define SP_UNLIKELY(x) __builtin_expect(!!(x), 0)
+#define SP_HOT __attribute__((hot))
+#define SP_COLD __attribute__((cold, noinline))
+#else
+#define SP_LIKELY(x) (x)
+#define SP_UNLIKELY(x) (x)
+#define SP_HOT
+#define SP_COLD
+#endif
+
+/**
+ * @brief 十进制整数解析(strtol(s, end, 10)的快速版本)
+ *
+ * @param[in] s 待解析的字符串
+ * @param[out] end 解析结束的位置 未解析到任何数字时等于s
+ * @param[out] err 溢出时置1
+ * @return long 解析结果
+ */
+static inline long fast_atol10(const char* s, const char** end, int* err)
+{
+    const char* p = s;
+    const char* digits;
+    unsigned long acc = 0;
+    unsigned long limit;
+    int neg = 0;
+
+    *err = 0;
+    while (*p == ' ' || (unsigned)(*p - '\\t') < 5) p++;
+    if (*p == '+' || *p == '-') neg = (*p++ == '-');
+    limit = neg ? (unsigned long)LONG_MAX + 1UL : (unsigned long)LONG_MAX;
+    digits = p;
+    while ((unsigned)(*p - '0') < 10) {
+        unsigned d = (unsigned)(*p++ - '0');
+        if (SP_UNLIKELY(acc > (limit - d) / 10)) {
+            *err = 1; /* 溢出 继续跳过剩余数字 */
+        } else {
+            acc = acc * 10 + d;
+        }
+    }
+    if (p == digits) {
+        *end = s; /* 未解析到任何数字 */
+        return 0;
+    }
+    *end = p;
+    if (*err) return neg ? LONG_MIN : LONG_MAX;
+    return neg ? (acc ? -(long)(acc - 1UL) - 1L : 0L) : (long)acc;
+}
+
+/**
+ * @brief 浮点数解析(strtof的快速版本)
+ *
+ * 仅处理"[+-]ddd[.ddd]"且有效数字不超过7位的常见情况, 此时尾数与10的幂都能被float精确表示,
+ * 一次除法即可得到正确舍入的结果; 其余情况(指数/inf/nan/首尾空白等)交由strtof处理
+ *
+ * @param[in] s 待解析的字符串
+ * @param[out] end 解析结束的位置 未解析到任何数字时等于s
+ * @return float 解析结果
+ */
+static inline float fast_strtof(const char* s, const char** end)
+{
+    static const float pow10f[] = {1e0f, 1e1f, 1e2f, 1e3f, 1e4f, 1e5f, 1e6f, 1e7f};
+    const char* p = s;
+    unsigned long mant = 0;
+    int ndigits = 0;
+    int nfrac = 0;
+    int neg = 0;
+
+    if (*p == '+' || *p == '-') neg = (*p++ == '-');
+    while ((unsigned)(*p - '0') < 10) {
+        mant = mant * 10 + (unsigned long)(*p++ - '0');
+        ndigits++;
+    }
+    if (*p == '.') {
+        p++;
+        while ((unsigned)(*p - '0') < 10) {
+            mant = mant * 10 + (unsigned long)(*p++ - '0');
+            ndigits++;
+            nfrac++;
+        }
+    }
+    if (FLT_EVAL_METHOD != 0 || ndigits == 0 || ndigits > 7 || *p != '\\0') {
+        char* e;
+        float v = strtof(s, &e);
+        *end = e;
+        return v;
+    }
+    *end = p;
+    float v = (float)mant / pow10f[nfrac];
+    return neg ? -v : v;
+}
+
+/**
+ * @brief 严格解析布尔值(仅接受"true"/"false"), 逐字节短路比较 不会越过value的结尾读取
+ *
+ * @param[in] v 待解析的字符串
+ * @return int 1:true 0:false -1:无效值
+ */
+static inline int parse_bool_strict(const char* v)
+{
+    if (v[0] == 't') {
+        return (v[1] == 'r' && v[2] == 'u' && v[3] == 'e' && v[4] == '\\0') ? 1 : -1;
+    }
+    if (v[0] == 'f') {
+        return (v[1] == 'a' && v[2] == 'l' && v[3] == 's' && v[4] == 'e' && v[5] == '\\0') ? 0 : -1;
+    }
+    return -1;
+}
+
+/**
+ * @brief 计算"section\\0name"的32位FNV-1a哈希, 与生成器中的_fnv1a_section_key()一致
+ *        哈希时顺带得到两个字符串的长度, 之后的确认比较无需再逐字节扫描
+ *
+ * @param[in] section 节
+ * @param[in] name 键
+ * @param[out] section_len section的长度
+ * @param[out] name_len name的长度
+ * @return uint32_t 哈希值
+ */
+static inline uint32_t settings_fnv1a2(const char* section, const char* name, size_t* section_len, size_t* name_len)
+{
+    uint32_t h = 2166136261u;
+    const char* p = section;
+    while (*p) {
+        h ^= (uint8_t)*p++;
+        h *= 16777619u;
+    }
+    *section_len = (size_t)(p - section);
+    h *= 16777619u; /* 分隔符'\\0' */
+    p = name;
+    while (*p) {
+        h ^= (uint8_t)*p++;
+        h *= 16777619u;
+    }
+    *name_len = (size_t)(p - name);
+    return h;
+}
+
+"""
+
+
+def _fnv1a_section_key(section, key):
+    """计算"section\\0key"的32位FNV-1a哈希, 需与生成的settings_fnv1a2()保持一致"""
+    h = 2166136261
+    for byte in f"{section}\0{key}".encode():
+        h = ((h ^ byte) * 16777619) & 0xFFFFFFFF
+    return h
+
+
+# ini_handler使用的配置项描述表与各类型的解析函数(与配置项无关的部分只输出一次)
+_INI_ITEM_PARSERS = """/* 配置项的数据类型 */
+enum {
+    SETTINGS_ITEM_INT,
+    SETTINGS_ITEM_FLOAT,
+    SETTINGS_ITEM_BOOL,
+    SETTINGS_ITEM_STRING,
+};
+
+/* 配置项描述: 成员位置/类型/范围/默认值均在生成时确定 */
+typedef struct {
+    const char* section;
+    const char* name;
+    size_t section_len;       /* strlen(section) */
+    size_t name_len;          /* strlen(name) */
+    const char* default_text; /* 日志中显示的默认值 */
+    const char* range_text;   /* 日志中显示的范围(仅int/float) */
+    size_t offset;            /* 成员在Settings中的偏移, 同时用于定位kSettingsDefaults中的默认值 */
+    size_t size;              /* 成员的大小 */
+    uint8_t type;             /* SETTINGS_ITEM_* */
+    union {
+        struct { long min; long max; } i;
+        struct { double min; double max; } f;
+    } u;                      /* 取值范围(仅int/float) */
+} settings_item_t;
+
+/* 按长度+memcmp确认(section, name)与配置项一致 长度不同时直接判定不一致 */
+static inline bool item_matches(const settings_item_t* item, const char* section, size_t section_len, const char* name, size_t name_len)
+{
+    return section_len == item->section_len && name_len == item->name_len &&
+           memcmp(section, item->section, section_len) == 0 && memcmp(name, item->name, name_len) == 0;
+}
+
+/* 从kSettingsDefaults中取回该配置项的默认值 */
+static void load_item_default(const settings_item_t* item, void* member)
+{
+    memcpy(member, (const char*)&kSettingsDefaults + item->offset, item->size);
+}
+
+/* 出错时的日志放在冷函数中, 不占用解析热路径的指令缓存 */
+SP_COLD static void log_item_parse_failed(const settings_item_t* item, const char* type_name)
+{
+    SETTINGS_PERSIST_SET_FUNC_LOG_TAG("settings_ini_handler");
+    SETTINGS_PERSIST_LOG_ERROR("settings.%s.%s(type:%s)转换失败, 已自动恢复默认值: %s", item->section, item->name, type_name, item->default_text);
+    (void)item;
+    (void)type_name;
+}
+
+SP_COLD static void log_item_out_of_range(const settings_item_t* item)
+{
+    SETTINGS_PERSIST_SET_FUNC_LOG_TAG("settings_ini_handler");
+    SETTINGS_PERSIST_LOG_ERROR("settings.%s.%s超出范围%s, 已自动恢复默认值: %s", item->section, item->name, item->range_text, item->default_text);
+    (void)item;
+}
+
+SP_HOT static void parse_int_item(const settings_item_t* item, void* member, const char* value)
+{
+    SETTINGS_PERSIST_SET_FUNC_LOG_TAG("settings_ini_handler");
+    int* m = (int*)member;
+    const char* endptr;
+    int err;
+    long val = fast_atol10(value, &endptr, &err);
+    /* 检查转换错误或未转换任何字符 */
+    if (SP_UNLIKELY(err != 0 || endptr == value)) {
+        /* 转换失败 使用默认值 */
+        load_item_default(item, m);
+        log_item_parse_failed(item, "int");
+    } else if (SP_UNLIKELY(val < item->u.i.min || val > item->u.i.max)) {
+        /* 超出范围 使用默认值 */
+        load_item_default(item, m);
+        log_item_out_of_range(item);
+    } else {
+        *m = (int)val;
+        SETTINGS_PERSIST_LOG_INFO("settings.%s.%s读取并解析成功: %d", item->section, item->name, (int)val);
+    }
+}
+
+SP_HOT static void parse_float_item(const settings_item_t* item, void* member, const char* value)
+{
+    SETTINGS_PERSIST_SET_FUNC_LOG_TAG("settings_ini_handler");
+    float* m = (float*)member;
+    const char* endptr;
+    errno = 0;
+    float val = fast_strtof(value, &endptr);
+    /* 检查转换错误或未转换任何字符 */
+    if (SP_UNLIKELY(errno != 0 || endptr == value)) {
+        /* 转换失败 使用默认值 */
+        load_item_default(item, m);
+        log_item_parse_failed(item, "float");
+    } else if (SP_UNLIKELY(val < item->u.f.min || val > item->u.f.max)) {
+        /* 超出范围 使用默认值 */
+        load_item_default(item, m);
+        log_item_out_of_range(item);
+    } else {
+        *m = val;
+        SETTINGS_PERSIST_LOG_INFO("settings.%s.%s读取并解析成功: %f", item->section, item->name, val);
+    }
+}
+
+SP_HOT static void parse_bool_item(const settings_item_t* item, void* member, const char* value)
+{
+    SETTINGS_PERSIST_SET_FUNC_LOG_TAG("settings_ini_handler");
+    bool* m = (bool*)member;
+    int b = parse_bool_strict(value);
+    if (b == 1) {
+        *m = true;
+        SETTINGS_PERSIST_LOG_INFO("settings.%s.%s读取并解析成功: true", item->section, item->name);
+    } else if (b == 0) {
+        *m = false;
+        SETTINGS_PERSIST_LOG_INFO("settings.%s.%s读取并解析成功: false", item->section, item->name);
+    } else {
+        /* 无效的布尔值 使用默认值 */
+        load_item_default(item, m);
+        log_item_parse_failed(item, "bool");
+    }
+}
+
+SP_HOT static void parse_string_item(const settings_item_t* item, void* member, const char* value)
+{
+    SETTINGS_PERSIST_SET_FUNC_LOG_TAG("settings_ini_handler");
+    char* m = (char*)member;
+    settings_copy_string(m, item->size, value);
+    SETTINGS_PERSIST_LOG_INFO("settings.%s.%s读取并解析成功: %s", item->section, item->name, m);
+}
+
+/* 按SETTINGS_ITEM_*索引的解析函数 */
+static void (*const settings_item_parsers[])(const settings_item_t*, void*, const char*) = {
+    [SETTINGS_ITEM_INT] = parse_int_item,
+    [SETTINGS_ITEM_FLOAT] = parse_float_item,
+    [SETTINGS_ITEM_BOOL] = parse_bool_item,
+    [SETTINGS_ITEM_STRING] = parse_string_item,
+};
+"""
+
+
+def _item_ctx(item):
+    """预先算出各代码模板共用的字段, 每个配置项只需计算一次"""
+    member = f"{item.section}.{item.key}"
+    return {
+        "section": item.section,
+        "key": item.key,
+        "section_len": len(item.section.encode()),
+        "key_len": len(item.key.encode()),
+        "member": member,
+        "member_access": f"settings->{member}",
+        "default_val": item.default,
+        "min": item.min,
+        "max": item.max,
+        # string:len统一归为string
+        "kind": "string" if item.type.startswith("string:") else item.type,
+    }
 
-            # 添加到总代码中
-            code += func_code + "\n"
 
-    return code
+# settings_items[]中各类型配置项的描述模板
+_ITEM_ROW_HEAD = '    {{"{section}", "{key}", {section_len}, {key_len}, "{default_val}", '
+_ITEM_ROW_TAIL = "offsetof(Settings, {member}), sizeof(((Settings*)0)->{member}), "
+_ITEM_ROW_TMPLS = {
+    "int": _ITEM_ROW_HEAD + '"[{min}, {max}]", ' + _ITEM_ROW_TAIL + "SETTINGS_ITEM_INT, {{.i = {{{min}, {max}}}}}}},\n",
+    "float": _ITEM_ROW_HEAD + '"[{min}, {max}]", ' + _ITEM_ROW_TAIL + "SETTINGS_ITEM_FLOAT, {{.f = {{{min}, {max}}}}}}},\n",
+    "bool": _ITEM_ROW_HEAD + "NULL, " + _ITEM_ROW_TAIL + "SETTINGS_ITEM_BOOL, {{.i = {{0, 0}}}}}},\n",
+    "string": _ITEM_ROW_HEAD + "NULL, " + _ITEM_ROW_TAIL + "SETTINGS_ITEM_STRING, {{.i = {{0, 0}}}}}},\n",
+}
 
 
 def generate_ini_handler_function(settings):
-    """生成更安全的ini_handler()函数，包含错误处理和范围检查"""
-    code = """/**
+    """生成更安全的ini_handler()函数，包含错误处理和范围检查(逐段产出)"""
+    yield _INI_PARSE_HELPERS
+    yield _INI_ITEM_PARSERS
+    yield "\n"
+
+    yield "/* 所有配置项的描述表 */\n"
+    yield "static const settings_item_t settings_items[] = {\n"
+    for item in settings:
+        ctx = _item_ctx(item)
+        yield _ITEM_ROW_TMPLS[ctx["kind"]].format_map(ctx)
+    yield "};\n"
+    yield "\n"
+    yield """/**
  * @brief INI文件的解析函数 需搭配inih库使用
  *
  * @param[in, out] user 解析结果
@@ -799,157 +1028,97 @@ def generate_ini_handler_function(settings):
 int settings_ini_handler(void* user, const char* section, const char* name, const char* value) {
     SETTINGS_PERSIST_SET_FUNC_LOG_TAG("settings_ini_handler");
     Settings* settings = (Settings*)user;
-    if (!settings || !section || !name || !value)
+    if (SP_UNLIKELY(!settings || !section || !name || !value))
     {
         SETTINGS_PERSIST_LOG_ERROR("输入参数中含有NULL");
         return 0;
-    }\n\n"""
-    # 按section分组处理
-    for item in settings:
-        section = item["section"]
-        key = item["key"]
-        data_type = item["type"]
-        default_val = item["default"]
-
-        member_access = f"settings->{section}.{key}"
-
-        # 生成匹配section和key的条件
-        code += f'    if (strcmp(section, "{section}") == 0 && strcmp(name, "{key}") == 0) {{\n'
-
-        # 根据类型生成不同的解析代码 
-        if data_type == "int":
-            # 整数类型，使用strtol进行安全转换，支持范围检查
-            code += f"        char* endptr;\n"
-            code += f"        long val;\n"
-            code += f"        errno = 0;\n"
-            code += f"        val = strtol(value, &endptr, 10);\n"
-            code += f"        /* 检查转换错误或未转换任何字符 */\n"
-            code += f"        if (errno != 0 || endptr == value) {{\n"
-            code += f"            /* 转换失败 使用默认值 */\n"
-            code += f"            {member_access} = {default_val};\n"
-            code += f'            SETTINGS_PERSIST_LOG_ERROR("settings.{section}.{key}(type:int)转换失败, 已自动恢复默认值: {default_val}");\n'
-            code += f"        }} else {{\n"
-            # 添加范围检查
-            code += f"            /* 检查范围 */\n"
-            code += f"            if (val < {item['min']} || val > {item['max']}) {{\n"
-            code += f"                /* 超出范围 使用默认值 */\n"
-            code += f"                {member_access} = {default_val};\n"
-            code += f"                SETTINGS_PERSIST_LOG_ERROR(\"settings.{section}.{key}超出范围[{item['min']}, {item['max']}], 已自动恢复默认值: {default_val}\");\n"
-            code += f"            }} else {{\n"
-            code += f"                {member_access} = (int)val;\n"
-            code += f'                SETTINGS_PERSIST_LOG_INFO("settings.{section}.{key}读取并解析成功: %d", (int)val);\n'
-            code += f"            }}\n"
-
-            code += f"        }}\n"
-
-        elif data_type == "float":
-            # 浮点类型，使用strtof进行安全转换，支持范围检查
-            code += f"        char* endptr;\n"
-            code += f"        float val;\n"
-            code += f"        errno = 0;\n"
-            code += f"        val = strtof(value, &endptr);\n"
-            code += f"        /* 检查转换错误或未转换任何字符 */\n"
-            code += f"        if (errno != 0 || endptr == value) {{\n"
-            code += f"            /* 转换失败 使用默认值 */\n"
-            code += f"            {member_access} = {default_val};\n"
-            code += f'            SETTINGS_PERSIST_LOG_ERROR("settings.{section}.{key}(type:float)转换失败, 已自动恢复默认值: {default_val}");\n'
-            code += f"        }} else {{\n"
-            # 添加范围检查
-            code += f"            /* 检查范围 */\n"
-            code += f"            if (val < {item['min']} || val > {item['max']}) {{\n"
-            code += f"                /* 超出范围 使用默认值 */\n"
-            code += f"                {member_access} = {default_val};\n"
-            code += f"                SETTINGS_PERSIST_LOG_ERROR(\"settings.{section}.{key}超出范围[{item['min']}, {item['max']}], 已自动恢复默认值: {default_val}\");\n"
-            code += f"            }} else {{\n"
-            code += f"                {member_access} = val;\n"
-            code += f'                SETTINGS_PERSIST_LOG_INFO("settings.{section}.{key}读取并解析成功: %f", val);\n'
-            code += f"            }}\n"
-
-            code += f"        }}\n"
-
-        elif data_type == "bool":
-            # 布尔类型 - 严格解析
-            code += f'        if (strcmp(value, "true") == 0) {{\n'
-            code += f"            {member_access} = true;\n"
-            code += f'            SETTINGS_PERSIST_LOG_INFO("settings.{section}.{key}读取并解析成功: true");\n'
-            code += f'        }} else if (strcmp(value, "false") == 0) {{\n'
-            code += f"            {member_access} = false;\n"
-            code += f'            SETTINGS_PERSIST_LOG_INFO("settings.{section}.{key}读取并解析成功: false");\n'
-            code += f"        }} else {{\n"
-            code += f"            /* 无效的布尔值 使用默认值 */\n"
-            code += f"            {member_access} = {default_val};\n"
-            code += f'            SETTINGS_PERSIST_LOG_ERROR("settings.{section}.{key}(type:bool)转换失败, 已自动恢复默认值: {default_val}");\n'
-            code += f"        }}\n"
-
-        elif data_type.startswith("string:"):
-            # 字符串类型settings_restore_defaults
-            code += (
-                f"        strncpy({member_access}, value, sizeof({member_access})-1);\n"
-            )
-            code += f"        {member_access}[sizeof({member_access})-1] = '\\0';\n"
-            code += f'        SETTINGS_PERSIST_LOG_INFO("settings.{section}.{key}读取并解析成功: %s", {member_access});\n'
+    }
+
+"""
 
+    # 生成时即可算出每个(section, key)的哈希与长度, 运行时只需1次哈希(顺带求长度)+1次memcmp确认
+    # case中只选出描述表中的配置项, 统一在switch之后与表中唯一的那份字符串比较确认;
+    # 哈希冲突的配置项共用同一个case, 在case内依次比较选出
+    # switch本身已是O(1)分派, 不再额外维护ARL式的"预期下一个键"游标(静态游标会让handler不可重入)
+    buckets = defaultdict(list)
+    for index, item in enumerate(settings):
+        buckets[_fnv1a_section_key(item.section, item.key)].append((index, item))
+
+    yield "    const settings_item_t* item = NULL;\n"
+    yield "    size_t section_len;\n"
+    yield "    size_t name_len;\n"
+    yield "    /* 按(section, name)的哈希分派 */\n"
+    yield "    switch (settings_fnv1a2(section, name, &section_len, &name_len)) {\n"
+    for h, entries in buckets.items():
+        names = ", ".join(f"{item.section}.{item.key}" for _, item in entries)
+        yield f"    case 0x{h:08X}u: /* {names} */\n"
+        if len(entries) == 1:
+            yield f"        item = &settings_items[{entries[0][0]}];\n"
         else:
-            code += f"        /* Unsupported type: {data_type} */\n"
+            for index, _ in entries:
+                yield f"        if (item_matches(&settings_items[{index}], section, section_len, name, name_len)) {{\n"
+                yield f"            item = &settings_items[{index}];\n"
+                yield "        }\n"
+        yield "        break;\n"
+    yield "    default:\n"
+    yield "        break;\n"
+    yield "    }\n"
+    yield "\n"
+    yield "    /* 哈希命中后再确认一次 排除未知记录恰好哈希相同的情况 */\n"
+    yield "    if (SP_LIKELY(item != NULL) && item_matches(item, section, section_len, name, name_len)) {\n"
+    yield "        settings_item_parsers[item->type](item, (char*)settings + item->offset, value);\n"
+    yield "        return 1;\n"
+    yield "    }\n"
+    yield "\n"
+    yield "    /* 未知的 section 或 name - 已忽略 */\n"
+    yield '    SETTINGS_PERSIST_LOG_WARN("读取到未知数据记录: %s(section)->%s(name)", section, name);\n'
+    yield "    return 0;\n"
+    yield "}\n"
+
+
+# kSettingsDefaults中各类型配置项的指定初始化器模板
+# 字符串数组未被初始化的尾部(以及结构体填充)按静态存储规则全部为0, CRC结果确定
+_DEFAULT_INIT_TMPLS = {
+    "int": "    .{member} = {default_val},\n",
+    "float": "    .{member} = {default_val},\n",
+    "bool": "    .{member} = {default_val},\n",
+    "string": '    .{member} = "{default_val}",\n',
+}
 
-        code += "        return 1;\n"
-        code += "    }\n\n"
 
-    code += "    /* 未知的 section 或 name - 已忽略 */\n"
-    code += '    SETTINGS_PERSIST_LOG_WARN("读取到未知数据记录: %s(section)->%s(name)", section, name);\n'
-    code += "    return 0;\n"
-    code += "}\n"
-    return code
+def generate_settings_defaults(sections):
+    """生成全部默认值唯一的一份定义kSettingsDefaults(逐段产出)"""
+    yield "/* 所有配置项的默认值 ini_handler的出错恢复与settings_restore_defaults()共用 */\n"
+    yield "static const Settings kSettingsDefaults = {\n"
+    for section, items in sections.items():
+        yield f"    /* {section} */\n"
+        for item in items:
+            ctx = _item_ctx(item)
+            yield _DEFAULT_INIT_TMPLS[ctx["kind"]].format_map(ctx)
+    yield "};\n"
 
 
-def generate_restore_defaults_function(settings):
-    """生成settings_restore_defaults()函数"""
-    code = """/**
+def generate_restore_defaults_function(sections):
+    """生成settings_restore_defaults()函数(逐段产出)"""
+    yield """/**
  * @brief 将Settings恢复至默认值
  *
  * @param[in, out] settings 目标
  */
-void settings_restore_defaults(Settings *settings) {\n"""
-    code += '    SETTINGS_PERSIST_SET_FUNC_LOG_TAG("settings_restore_defaults");\n'
-    code += "    if (!settings)\n"
-    code += "    {\n"
-    code += '        SETTINGS_PERSIST_LOG_ERROR("输入参数为NULL");\n'
-    code += "        return;\n"
-    code += "    }\n\n"
-
-    # 按section分组
-    sections = {}
-    for item in settings:
-        section = item["section"]
-        if section not in sections:
-            sections[section] = []
-        sections[section].append(item)
-
-    # 生成每个配置项的默认值设置
-    for section, items in sections.items():
-        code += f"    /* 恢复 {section} 至默认值 */\n"
-
-        for item in items:
-            member_access = f"settings->{section}.{item['key']}"
-
-            # 根据类型处理默认值
-            if item["type"].startswith("string:"):
-                # string类型
-                code += f"    strncpy({member_access}, \"{item['default']}\", sizeof({member_access})-1);\n"
-                code += f"    {member_access}[sizeof({member_access})-1] = '\\0';\n"
-            elif item["type"] == "bool":
-                # bool类型
-                default_val = "true" if item["default"] == "true" else "false"
-                code += f"    {member_access} = {default_val};\n"
-            else:
-                # int类型
-                code += f"    {member_access} = {item['default']};\n"
-
-        code += "\n"
-
-    code += "}\n"
-
-    code += """
+void settings_restore_defaults(Settings *settings) {
+"""
+    yield '    SETTINGS_PERSIST_SET_FUNC_LOG_TAG("settings_restore_defaults");\n'
+    yield "    if (!settings)\n"
+    yield "    {\n"
+    yield '        SETTINGS_PERSIST_LOG_ERROR("输入参数为NULL");\n'
+    yield "        return;\n"
+    yield "    }\n"
+    yield "\n"
+    # 整体拷贝默认值表 字符串尾部与结构体填充一并恢复为0
+    yield "    memcpy(settings, &kSettingsDefaults, sizeof(*settings));\n"
+    yield "}\n"
+
+    yield """
 int settings_persist_reset_all_data(void)
 {
     SETTINGS_PERSIST_SET_FUNC_LOG_TAG("settings_persist_reset_all_data");
@@ -970,12 +1139,152 @@ int settings_persist_reset_all_data(void)
 }
 
 """
-    return code
 
 
-def generate_write_function(settings):
-    """生成write_settings_to_file()函数"""
-    code = """/**
+# write_settings_to_file()中各类型数值写出时的最大字节数(不含"key="与换行)
+_INT_TEXT_MAX = len("-2147483648")
+_FLOAT_TEXT_MAX = len("-340282346638528859811704183484516925440.000000")  # "%f"格式下的-FLT_MAX
+_BOOL_TEXT_MAX = len("false")
+
+
+# write_settings_to_file()前输出的十进制整数格式化辅助函数(代替fprintf的"%d")
+_WRITE_HELPERS = """/* 0~99的两位十进制字符表 每次处理两位数字 */
+static const char digits_lut[] =
+    "0001020304050607080910111213141516171819"
+    "2021222324252627282930313233343536373839"
+    "4041424344454647484950515253545556575859"
+    "6061626364656667686970717273747576777879"
+    "8081828384858687888990919293949596979899";
+
+/**
+ * @brief 将无符号整数以十进制写入out(不写入'\\0')
+ *
+ * @param[in] v 待格式化的值
+ * @param[out] out 输出位置 至少需要10字节
+ * @return char* 写入结束的位置
+ */
+static inline char* fast_utoa10(unsigned v, char* out)
+{
+    char tmp[10];
+    char* t = tmp + sizeof(tmp);
+    while (v >= 100) {
+        unsigned i = (v % 100) * 2;
+        v /= 100;
+        *--t = digits_lut[i + 1];
+        *--t = digits_lut[i];
+    }
+    if (v >= 10) {
+        *--t = digits_lut[v * 2 + 1];
+        *--t = digits_lut[v * 2];
+    } else {
+        *--t = (char)('0' + v);
+    }
+    size_t n = (size_t)(tmp + sizeof(tmp) - t);
+    memcpy(out, t, n);
+    return out + n;
+}
+
+/**
+ * @brief 将整数以十进制写入out(不写入'\\0'), 结果与printf的"%d"一致
+ *
+ * @param[in] v 待格式化的值
+ * @param[out] out 输出位置 至少需要11字节
+ * @return char* 写入结束的位置
+ */
+static inline char* fast_itoa10(int v, char* out)
+{
+    unsigned u = (unsigned)v;
+    if (v < 0) {
+        *out++ = '-';
+        u = 0u - u;
+    }
+    return fast_utoa10(u, out);
+}
+
+"""
+
+
+def _write_buffer_bound(sections):
+    """计算保存文件内容的字节数上限, 用于生成栈上缓冲区的大小"""
+    bound = 0
+    for section, items in sections.items():
+        bound += len(f"[{section}]\n".encode())
+        for item in items:
+            if item.type == "int":
+                value_max = _INT_TEXT_MAX
+            elif item.type == "float":
+                value_max = _FLOAT_TEXT_MAX
+            elif item.type == "bool":
+                value_max = _BOOL_TEXT_MAX
+            elif item.type.startswith("string:"):
+                value_max = item.str_len - 1
+            else:
+                value_max = 0
+            bound += len(f"{item.key}=\n".encode()) + value_max
+    return bound
+
+
+# write_settings_to_file()中各类型配置项写出值的模板("key="与换行由_emit_literal()合并输出)
+_WRITE_TMPLS = {
+    "int": "    p = fast_itoa10({member_access}, p);\n",
+    # "%f"的结果需与读回后的值逐位一致(CRC按结构体计算), 浮点数仍交给snprintf
+    "float": '    p += snprintf(p, sizeof(buf) - (size_t)(p - buf), "%f", {member_access});\n',
+    "bool": """    if ({member_access}) {{
+        memcpy(p, "true", 4);
+        p += 4;
+    }} else {{
+        memcpy(p, "false", 5);
+        p += 5;
+    }}
+""",
+    "string": """    {{
+        size_t n = strnlen({member_access}, sizeof({member_access}) - 1);
+        memcpy(p, {member_access}, n);
+        p += n;
+    }}
+""",
+}
+
+
+def _emit_literal(text):
+    """将生成时即已确定的常量片段输出为1次定长memcpy"""
+    if not text:
+        return
+    size = len(text.encode())
+    # 节名/键名均为C标识符, 只有换行需要转义
+    escaped = text.replace("\n", "\\n")
+    yield f'    memcpy(p, "{escaped}", {size});\n'
+    yield f"    p += {size};\n"
+
+
+def generate_write_function(sections):
+    """生成write_settings_to_file()函数(逐段产出)"""
+    yield _WRITE_HELPERS
+    yield """/**
+ * @brief 将缓冲区中的数据全部写入fd(处理被信号中断与部分写入的情况)
+ *
+ * @param[in] fd 目标文件描述符
+ * @param[in] buf 待写入的数据
+ * @param[in] len 待写入的字节数
+ * @return 0成功 -1失败(errno由write设置)
+ */
+static int write_all(int fd, const char* buf, size_t len)
+{
+    while (len > 0) {
+        ssize_t n = write(fd, buf, len);
+        if (n < 0) {
+            if (errno == EINTR) {
+                continue;
+            }
+            return -1;
+        }
+        buf += n;
+        len -= (size_t)n;
+    }
+    return 0;
+}
+
+/**
  * @brief 将设置保存到对应文件中(以ini格式)
  *
  * @param[in] filename 保存到的文件路径
@@ -984,6 +1293,7 @@ def generate_write_function(settings):
  * @retval 0 保存成功
  * @retval -1 保存失败: 输入参数中含有NULL
  * @retval -2 保存失败: 未知原因
+ * @note 使用静态缓冲区, 不可重入; 调用方(save_settings_with_crc)须持有cache_mutex
  */
 int write_settings_to_file(const char* filename, const Settings* settings) {
     SETTINGS_PERSIST_SET_FUNC_LOG_TAG("write_settings_to_file");
@@ -994,168 +1304,165 @@ int write_settings_to_file(const char* filename, const Settings* settings) {
         return -1;
     }
 
-    FILE* file = NULL;
-    int retries = 2; /* 最多重试2次(1次正常写入 1次删除重建写入) */\n\n"""
+"""
 
-    # 按section分组
-    sections = {}
-    for item in settings:
-        section = item["section"]
-        if section not in sections:
-            sections[section] = []
-        sections[section].append(item)
-
-    # 生成每个section和配置项的写入代码
-    first_section = True
-    code += "    while (retries-- > 0) {\n"
-    code += "        /* 尝试正常打开并写入 */\n"
-    code += '        file = fopen(filename, "w");\n'
-    code += "        if (file) {\n"
+    # 先在缓冲区中拼好完整的文件内容, 之后每次尝试只需1次write
+    yield "    /*\n"
+    yield "     * 完整文件内容的上限由生成器根据各配置项的最大长度算出\n"
+    yield "     * 大小随配置项增长, 不能放在工作线程8KB的栈上, 因此使用静态存储;\n"
+    yield "     * 所有调用方均在持有cache_mutex时调用, 不会并发使用该缓冲区\n"
+    yield "     */\n"
+    yield f"    static char buf[{_write_buffer_bound(sections)}];\n"
+    yield "    char* p = buf;\n"
+    # 相邻的常量片段(换行/节头/"key=")在生成时合并, 每段只需1次定长memcpy
+    literal = ""
     for section, items in sections.items():
-        first_section = False
-
-        code += f"            /* Write {section} settings */\n"
-        code += f'            fprintf(file, "[{section}]\\n");\n'
+        literal += f"[{section}]\n"
 
         for item in items:
-            member_access = f"settings->{section}.{item['key']}"
-
-            # 根据类型生成不同的写入代码
-            if item["type"] in ["int", "float"]:
-                fmt = "%f" if item["type"] == "float" else "%d"
-                code += f"            fprintf(file, \"{item['key']}={fmt}\\n\", {member_access});\n"
-            elif item["type"] == "bool":
-                code += f"            fprintf(file, \"{item['key']}=%s\\n\", {member_access} ? \"true\" : \"false\");\n"
-            elif item["type"].startswith("string:"):
-                code += f"            fprintf(file, \"{item['key']}=%s\\n\", {member_access});\n"
-            else:
-                code += f"            /* Unsupported type: {item['type']} for {item['key']} */\n"
-                code += f"            SETTINGS_PERSIST_LOG_ERROR(\"检测到{item['key']}具有暂不支持的数据类型({item['type']}), 请检查!!!\");\n"
-
-    code += "            /* 确保数据刷盘 */\n"
-    code += "            int fd = fileno(file);\n"
-    code += "            if (fflush(file) != 0 || fsync(fd) != 0) {\n"
-    code += "                fclose(file);\n"
-    code += "                errno = EIO;\n"
-    code += "                continue; /* 刷盘失败 开始重试 */\n"
-    code += "            }\n"
-    code += "            fclose(file);\n"
-    code += '            SETTINGS_PERSIST_LOG_DEBUG("成功保存");\n'
-    code += "            return 0; /* 写入成功 */\n"
-    code += "        }\n"
-    code += "\n"
-    code += '        SETTINGS_PERSIST_LOG_ERROR("保存失败");\n'
-    code += "        /* 打开失败 判断是否需要删除重建 */\n"
-    code += "        int err = errno;\n"
-    code += '        /* 仅处理"文件存在但无法打开"的情况 */\n'
-    code += "        if (err != EIO && err != EACCES) {\n"
-    code += "            /* 其他错误 */\n"
-    code += '            SETTINGS_PERSIST_LOG_WARN("未知原因, 暂时无法挽救");\n'
-    code += "            break;\n"
-    code += "        }\n"
-    code += "        struct stat st;\n"
-    code += "        int file_exists = (stat(filename, &st) == 0);\n"
-    code += "        int is_regular = file_exists ? S_ISREG(st.st_mode) : 0;\n"
-    code += "\n"
-    code += "        if (file_exists && is_regular) {\n"
-    code += "            /* 尝试删除异常文件 */\n"
-    code += (
-        '            SETTINGS_PERSIST_LOG_INFO("文件存在但是无法打开, 准备删除重建");\n'
-    )
-    code += "            if (unlink(filename) != 0) {\n"
-    code += "                /* 删除失败 直接退出 */\n"
-    code += (
-        '                SETTINGS_PERSIST_LOG_ERROR("文件unlink失败, 我也没招了");\n'
-    )
-    code += "                break;\n"
-    code += "            }\n"
-    code += "        }\n"
-    code += "        else {\n"
-    code += (
-        '            SETTINGS_PERSIST_LOG_WARN("文件不存在或不是普通文件 无需删除");\n'
-    )
-    code += "            break;\n"
-    code += "        }\n"
-    code += "    }\n"
-    code += "    /* 所有重试失败 返回错误 */\n"
-    code += '    SETTINGS_PERSIST_LOG_ERROR("最终还是失败了");\n'
-    code += "    return -2;\n"
-    code += "}\n"
-
-    return code
+            ctx = _item_ctx(item)
+            tmpl = _WRITE_TMPLS.get(ctx["kind"])
+            if tmpl is None:
+                yield f"    /* Unsupported type: {item.type} for {item.key} */\n"
+                yield f"    SETTINGS_PERSIST_LOG_ERROR(\"检测到{item.key}具有暂不支持的数据类型({item.type}), 请检查!!!\");\n"
+                continue
+            yield from _emit_literal(literal + f"{item.key}=")
+            yield tmpl.format_map(ctx)
+            literal = "\n"
+    yield from _emit_literal(literal)
+
+    yield "    size_t len = (size_t)(p - buf);\n"
+    yield "\n"
+    yield "    int retries = 2; /* 最多重试2次(1次正常写入 1次删除重建写入) */\n"
+    yield "    while (retries-- > 0) {\n"
+    yield "        /* 尝试正常打开并写入 */\n"
+    # 原子替换由调用方(save_settings_with_crc)的"临时文件+rename"负责, 这里只需写入并刷盘
+    yield "        int fd = open(filename, O_WRONLY | O_CREAT | O_TRUNC | O_CLOEXEC, 0666);\n"
+    yield "        if (fd >= 0) {\n"
+    yield "            /* 一次性写入并确保数据刷盘(文件长度等读回所需的元数据也会由fdatasync一并落盘) */\n"
+    yield "            if (write_all(fd, buf, len) != 0 || fdatasync(fd) != 0) {\n"
+    yield "                close(fd);\n"
+    yield "                errno = EIO;\n"
+    yield "                continue; /* 写入或刷盘失败 开始重试 */\n"
+    yield "            }\n"
+    yield "            close(fd);\n"
+    yield '            SETTINGS_PERSIST_LOG_DEBUG("成功保存");\n'
+    yield "            return 0; /* 写入成功 */\n"
+    yield "        }\n"
+    yield "\n"
+    yield '        SETTINGS_PERSIST_LOG_ERROR("保存失败");\n'
+    yield "        /* 打开失败 判断是否需要删除重建 */\n"
+    yield "        int err = errno;\n"
+    yield '        /* 仅处理"文件存在但无法打开"的情况 */\n'
+    yield "        if (err != EIO && err != EACCES) {\n"
+    yield "            /* 其他错误 */\n"
+    yield '            SETTINGS_PERSIST_LOG_WARN("未知原因, 暂时无法挽救");\n'
+    yield "            break;\n"
+    yield "        }\n"
+    yield "        struct stat st;\n"
+    yield "        int file_exists = (stat(filename, &st) == 0);\n"
+    yield "        int is_regular = file_exists ? S_ISREG(st.st_mode) : 0;\n"
+    yield "\n"
+    yield "        if (file_exists && is_regular) {\n"
+    yield "            /* 尝试删除异常文件 */\n"
+    yield '            SETTINGS_PERSIST_LOG_INFO("文件存在但是无法打开, 准备删除重建");\n'
+    yield "            if (unlink(filename) != 0) {\n"
+    yield "                /* 删除失败 直接退出 */\n"
+    yield '                SETTINGS_PERSIST_LOG_ERROR("文件unlink失败, 我也没招了");\n'
+    yield "                break;\n"
+    yield "            }\n"
+    yield "        }\n"
+    yield "        else {\n"
+    yield '            SETTINGS_PERSIST_LOG_WARN("文件不存在或不是普通文件 无需删除");\n'
+    yield "            break;\n"
+    yield "        }\n"
+    yield "    }\n"
+    yield "    /* 所有重试失败 返回错误 */\n"
+    yield '    SETTINGS_PERSIST_LOG_ERROR("最终还是失败了");\n'
+    yield "    return -2;\n"
+    yield "}\n"
+
+
+def _file_banner(file_name, brief, current_date):
+    """生成两个输出文件共用的文件头注释(按行, 每行带换行符)"""
+    return [
+        "/**\n",
+        f" * @file {file_name}\n",
+        " * @author auto-generated\n",
+        f" * @brief {brief}\n",
+        " * @version 0.1\n",
+        f" * @date {current_date}\n",
+        " *\n",
+        " * @attention This file is auto-generated by generate_settings_from_ini.py. Do not edit manually!\n",
+        " * @copyright Copyright (c) 2025\n",
+        " *\n",
+        " */\n",
+    ]
+
+
+# settings_auto_generated.c开头的#include
+_IMPL_INCLUDES = [
+    "#include <errno.h>\n",
+    "#include <fcntl.h>\n",
+    "#include <float.h>\n",
+    "#include <limits.h>\n",
+    "#include <pthread.h>\n",
+    "#include <stddef.h>\n",
+    "#include <stdint.h>\n",
+    "#include <stdio.h>\n",
+    "#include <string.h>\n",
+    "#include <stdlib.h>\n",
+    "#include <unistd.h>\n",
+    "#include <sys/stat.h>\n",
+    '#include "settings_persist.h"\n',
+    '#define SETTINGS_PERSIST_MODULE_TAG "settings_persist"\n',
+    '#include "settings_persist_log.h"\n',
+]
+
+# 输出文件的缓冲区大小, 避免逐段写入时频繁触发系统调用
+_OUTPUT_BUFFERING = 1 << 20
 
 
 def main():
-    settings = parse_settings_ini("./settings(for_code_generator).ini")
+    settings, sections = parse_settings_ini("./settings(for_code_generator).ini")
 
     # 调试：打印解析结果
     print("\nParsed settings:")
     for item in settings:
-        print(f"Section: {item['section']}, Key: {item['key']}")
-        print(f"  Type: {item['type']}, Default: {item['default']}")
-        print(f"  Min: {item['min']}, Max: {item['max']}")
-        print(f"  Comment: {item['comment']}\n")
+        print(f"Section: {item.section}, Key: {item.key}")
+        print(f"  Type: {item.type}, Default: {item.default}")
+        print(f"  Min: {item.min}, Max: {item.max}")
+        print(f"  Comment: {item.comment}\n")
 
     # 获取当前日期
     current_date = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
-    # 生成代码
+    # 生成代码: 各生成函数逐段产出, 直接写入文件
     print("Generating settings code...")
-    header_code = generate_settings_persist_header(settings)
-    set_functions = generate_settings_set_functions(settings)
-    ini_handler = generate_ini_handler_function(settings)
-    restore_defaults = generate_restore_defaults_function(settings)
-    write_function = generate_write_function(settings)
 
     # 获取当前脚本所在的目录路径
     current_script_dir = Path(__file__).parent
 
     # 输出头文件
     header_path = current_script_dir / "../settings_persist.h"
-    with open(header_path, "w") as f:
-        f.write("/**\n")
-        f.write(" * @file settings_persist.h\n")
-        f.write(" * @author auto-generated\n")
-        f.write(" * @brief Settings_persist模块的头文件\n")
-        f.write(" * @version 0.1\n")
-        f.write(f" * @date {current_date}\n")
-        f.write(" *\n")
-        f.write(" * @attention This file is auto-generated by generate_settings_from_ini.py. Do not edit manually!\n")
-        f.write(" * @copyright Copyright (c) 2025\n")
-        f.write(" *\n")
-        f.write(" */\n")
-        f.write(header_code)
+    with open(header_path, "w", buffering=_OUTPUT_BUFFERING) as f:
+        f.writelines(_file_banner("settings_persist.h", "Settings_persist模块的头文件", current_date))
+        f.write(generate_settings_persist_header(sections))
 
     # 输出自动生成的实现文件
     impl_path = current_script_dir / "../settings_auto_generated.c"
-    with open(impl_path, "w") as f:
-        f.write("/**\n")
-        f.write(" * @file settings_auto_generated.c\n")
-        f.write(" * @author auto-generated\n")
-        f.write(" * @brief Settings_persist模块中自动生成的代码\n")
-        f.write(" * @version 0.1\n")
-        f.write(f" * @date {current_date}\n")
-        f.write(" *\n")
-        f.write(" * @attention This file is auto-generated by generate_settings_from_ini.py. Do not edit manually!\n")
-        f.write(" * @copyright Copyright (c) 2025\n")
-        f.write(" *\n")
-        f.write(" */\n")
-        f.write("#include <errno.h>\n")
-        f.write("#include <pthread.h>\n")
-        f.write("#include <stdio.h>\n")
-        f.write("#include <string.h>\n")
-        f.write("#include <stdlib.h>\n")
-        f.write("#include <unistd.h>\n")
-        f.write("#include <sys/stat.h>\n")
-        f.write('#include "settings_persist.h"\n')
-        f.write('#define SETTINGS_PERSIST_MODULE_TAG "settings_persist"\n')
-        f.write('#include "settings_persist_log.h"\n')
-        f.write(set_functions)
-        f.write(ini_handler)
+    with open(impl_path, "w", buffering=_OUTPUT_BUFFERING) as f:
+        f.writelines(_file_banner("settings_auto_generated.c", "Settings_persist模块中自动生成的代码", current_date))
+        f.writelines(_IMPL_INCLUDES)
+        f.writelines(generate_settings_set_functions(sections))
+        f.write("\n")
+        f.writelines(generate_settings_defaults(sections))
+        f.write("\n")
+        f.writelines(generate_ini_handler_function(settings))
         f.write("\n")
-        f.write(restore_defaults)
+        f.writelines(generate_restore_defaults_function(sections))
         f.write("\n")
-        f.write(write_function)
+        f.writelines(generate_write_function(sections))
 
     print(f"Generated files: {header_path} and {impl_path}")
 
@@ -3,14 +3,19 @@
  * @author auto-generated
  * @brief Settings_persist模块中自动生成的代码
  * @version 0.1
- * @date 2025-11-06 15:26:40
+ * @date 2026-10-14 10:51:39
  *
  * @attention This file is auto-generated by generate_settings_from_ini.py. Do not edit manually!
  * @copyright Copyright (c) 2025
  *
  */
 #include <errno.h>
+#include <fcntl.h>
+#include <float.h>
+#include <limits.h>
 #include <pthread.h>
+#include <stddef.h>
+#include <stdint.h>
 #include <stdio.h>
 #include <string.h>
 #include <stdlib.h>
@@ -25,6 +30,21 @@ extern pthread_mutex_t settings_persist_thread_status_mutex;
 extern Settings settings_cache;
 extern pthread_mutex_t cache_mutex;
 
+/**
+ * @brief 将字符串拷贝到定长数组中, 超出部分截断, 尾部全部清零(含结尾'\0')
+ *        CRC按整个Settings结构体计算, 缩短后的字符串不能残留旧内容
+ *
+ * @param[out] dst 目标数组
+ * @param[in] dst_size 目标数组的大小
+ * @param[in] src 源字符串
+ */
+static inline void settings_copy_string(char* dst, size_t dst_size, const char* src)
+{
+    size_t len = strnlen(src, dst_size - 1);
+    memcpy(dst, src, len);
+    memset(dst + len, 0, dst_size - len);
+}
+
 int settings_persist_set_Audio_volume(int volume)
 {
     SETTINGS_PERSIST_SET_FUNC_LOG_TAG("settings_persist_set_Audio_volume");
@@ -110,12 +130,309 @@ int settings_persist_set_Display_screensaver(const char* screensaver)
     }
 
     pthread_mutex_lock(&cache_mutex);
-    strcpy(settings_cache.Display.screensaver, screensaver);
+    settings_copy_string(settings_cache.Display.screensaver, sizeof(settings_cache.Display.screensaver), screensaver);
     pthread_mutex_unlock(&cache_mutex);
     SETTINGS_PERSIST_LOG_DEBUG("数据更新成功");
     pthread_mutex_unlock(&settings_persist_thread_status_mutex);
     return 0;
 }
+
+/* 所有配置项的默认值 ini_handler的出错恢复与settings_restore_defaults()共用 */
+static const Settings kSettingsDefaults = {
+    /* Audio */
+    .Audio.volume = 75,
+    .Audio.mute = false,
+    /* Display */
+    .Display.brightness = 60,
+    .Display.screensaver = "enabled",
+    /* Verify */
+    .Verify.crc_16_ibm = 0,
+};
+
+/*
+ * 分支预测与冷热路径提示: 解析/保存时出错属于极少数情况
+ * 非GCC/Clang编译器下均退化为空, 不影响语义
+ */
+#if defined(__GNUC__)
+#define SP_LIKELY(x) __builtin_expect(!!(x), 1)
+#define SP_UNLIKELY(x) __builtin_expect(!!(x), 0)
+#define SP_HOT __attribute__((hot))
+#define SP_COLD __attribute__((cold, noinline))
+#else
+#define SP_LIKELY(x) (x)
+#define SP_UNLIKELY(x) (x)
+#define SP_HOT
+#define SP_COLD
+#endif
+
+/**
+ * @brief 十进制整数解析(strtol(s, end, 10)的快速版本)
+ *
+ * @param[in] s 待解析的字符串
+ * @param[out] end 解析结束的位置 未解析到任何数字时等于s
+ * @param[out] err 溢出时置1
+ * @return long 解析结果
+ */
+static inline long fast_atol10(const char* s, const char** end, int* err)
+{
+    const char* p = s;
+    const char* digits;
+    unsigned long acc = 0;
+    unsigned long limit;
+    int neg = 0;
+
+    *err = 0;
+    while (*p == ' ' || (unsigned)(*p - '\t') < 5) p++;
+    if (*p == '+' || *p == '-') neg = (*p++ == '-');
+    limit = neg ? (unsigned long)LONG_MAX + 1UL : (unsigned long)LONG_MAX;
+    digits = p;
+    while ((unsigned)(*p - '0') < 10) {
+        unsigned d = (unsigned)(*p++ - '0');
+        if (SP_UNLIKELY(acc > (limit - d) / 10)) {
+            *err = 1; /* 溢出 继续跳过剩余数字 */
+        } else {
+            acc = acc * 10 + d;
+        }
+    }
+    if (p == digits) {
+        *end = s; /* 未解析到任何数字 */
+        return 0;
+    }
+    *end = p;
+    if (*err) return neg ? LONG_MIN : LONG_MAX;
+    return neg ? (acc ? -(long)(acc - 1UL) - 1L : 0L) : (long)acc;
+}
+
+/**
+ * @brief 浮点数解析(strtof的快速版本)
+ *
+ * 仅处理"[+-]ddd[.ddd]"且有效数字不超过7位的常见情况, 此时尾数与10的幂都能被float精确表示,
+ * 一次除法即可得到正确舍入的结果; 其余情况(指数/inf/nan/首尾空白等)交由strtof处理
+ *
+ * @param[in] s 待解析的字符串
+ * @param[out] end 解析结束的位置 未解析到任何数字时等于s
+ * @return float 解析结果
+ */
+static inline float fast_strtof(const char* s, const char** end)
+{
+    static const float pow10f[] = {1e0f, 1e1f, 1e2f, 1e3f, 1e4f, 1e5f, 1e6f, 1e7f};
+    const char* p = s;
+    unsigned long mant = 0;
+    int ndigits = 0;
+    int nfrac = 0;
+    int neg = 0;
+
+    if (*p == '+' || *p == '-') neg = (*p++ == '-');
+    while ((unsigned)(*p - '0') < 10) {
+        mant = mant * 10 + (unsigned long)(*p++ - '0');
+        ndigits++;
+    }
+    if (*p == '.') {
+        p++;
+        while ((unsigned)(*p - '0') < 10) {
+            mant = mant * 10 + (unsigned long)(*p++ - '0');
+            ndigits++;
+            nfrac++;
+        }
+    }
+    if (FLT_EVAL_METHOD != 0 || ndigits == 0 || ndigits > 7 || *p != '\0') {
+        char* e;
+        float v = strtof(s, &e);
+        *end = e;
+        return v;
+    }
+    *end = p;
+    float v = (float)mant / pow10f[nfrac];
+    return neg ? -v : v;
+}
+
+/**
+ * @brief 严格解析布尔值(仅接受"true"/"false"), 逐字节短路比较 不会越过value的结尾读取
+ *
+ * @param[in] v 待解析的字符串
+ * @return int 1:true 0:false -1:无效值
+ */
+static inline int parse_bool_strict(const char* v)
+{
+    if (v[0] == 't') {
+        return (v[1] == 'r' && v[2] == 'u' && v[3] == 'e' && v[4] == '\0') ? 1 : -1;
+    }
+    if (v[0] == 'f') {
+        return (v[1] == 'a' && v[2] == 'l' && v[3] == 's' && v[4] == 'e' && v[5] == '\0') ? 0 : -1;
+    }
+    return -1;
+}
+
+/**
+ * @brief 计算"section\0name"的32位FNV-1a哈希, 与生成器中的_fnv1a_section_key()一致
+ *        哈希时顺带得到两个字符串的长度, 之后的确认比较无需再逐字节扫描
+ *
+ * @param[in] section 节
+ * @param[in] name 键
+ * @param[out] section_len section的长度
+ * @param[out] name_len name的长度
+ * @return uint32_t 哈希值
+ */
+static inline uint32_t settings_fnv1a2(const char* section, const char* name, size_t* section_len, size_t* name_len)
+{
+    uint32_t h = 2166136261u;
+    const char* p = section;
+    while (*p) {
+        h ^= (uint8_t)*p++;
+        h *= 16777619u;
+    }
+    *section_len = (size_t)(p - section);
+    h *= 16777619u; /* 分隔符'\0' */
+    p = name;
+    while (*p) {
+        h ^= (uint8_t)*p++;
+        h *= 16777619u;
+    }
+    *name_len = (size_t)(p - name);
+    return h;
+}
+
+/* 配置项的数据类型 */
+enum {
+    SETTINGS_ITEM_INT,
+    SETTINGS_ITEM_FLOAT,
+    SETTINGS_ITEM_BOOL,
+    SETTINGS_ITEM_STRING,
+};
+
+/* 配置项描述: 成员位置/类型/范围/默认值均在生成时确定 */
+typedef struct {
+    const char* section;
+    const char* name;
+    size_t section_len;       /* strlen(section) */
+    size_t name_len;          /* strlen(name) */
+    const char* default_text; /* 日志中显示的默认值 */
+    const char* range_text;   /* 日志中显示的范围(仅int/float) */
+    size_t offset;            /* 成员在Settings中的偏移, 同时用于定位kSettingsDefaults中的默认值 */
+    size_t size;              /* 成员的大小 */
+    uint8_t type;             /* SETTINGS_ITEM_* */
+    union {
+        struct { long min; long max; } i;
+        struct { double min; double max; } f;
+    } u;                      /* 取值范围(仅int/float) */
+} settings_item_t;
+
+/* 按长度+memcmp确认(section, name)与配置项一致 长度不同时直接判定不一致 */
+static inline bool item_matches(const settings_item_t* item, const char* section, size_t section_len, const char* name, size_t name_len)
+{
+    return section_len == item->section_len && name_len == item->name_len &&
+           memcmp(section, item->section, section_len) == 0 && memcmp(name, item->name, name_len) == 0;
+}
+
+/* 从kSettingsDefaults中取回该配置项的默认值 */
+static void load_item_default(const settings_item_t* item, void* member)
+{
+    memcpy(member, (const char*)&kSettingsDefaults + item->offset, item->size);
+}
+
+/* 出错时的日志放在冷函数中, 不占用解析热路径的指令缓存 */
+SP_COLD static void log_item_parse_failed(const settings_item_t* item, const char* type_name)
+{
+    SETTINGS_PERSIST_SET_FUNC_LOG_TAG("settings_ini_handler");
+    SETTINGS_PERSIST_LOG_ERROR("settings.%s.%s(type:%s)转换失败, 已自动恢复默认值: %s", item->section, item->name, type_name, item->default_text);
+    (void)item;
+    (void)type_name;
+}
+
+SP_COLD static void log_item_out_of_range(const settings_item_t* item)
+{
+    SETTINGS_PERSIST_SET_FUNC_LOG_TAG("settings_ini_handler");
+    SETTINGS_PERSIST_LOG_ERROR("settings.%s.%s超出范围%s, 已自动恢复默认值: %s", item->section, item->name, item->range_text, item->default_text);
+    (void)item;
+}
+
+SP_HOT static void parse_int_item(const settings_item_t* item, void* member, const char* value)
+{
+    SETTINGS_PERSIST_SET_FUNC_LOG_TAG("settings_ini_handler");
+    int* m = (int*)member;
+    const char* endptr;
+    int err;
+    long val = fast_atol10(value, &endptr, &err);
+    /* 检查转换错误或未转换任何字符 */
+    if (SP_UNLIKELY(err != 0 || endptr == value)) {
+        /* 转换失败 使用默认值 */
+        load_item_default(item, m);
+        log_item_parse_failed(item, "int");
+    } else if (SP_UNLIKELY(val < item->u.i.min || val > item->u.i.max)) {
+        /* 超出范围 使用默认值 */
+        load_item_default(item, m);
+        log_item_out_of_range(item);
+    } else {
+        *m = (int)val;
+        SETTINGS_PERSIST_LOG_INFO("settings.%s.%s读取并解析成功: %d", item->section, item->name, (int)val);
+    }
+}
+
+SP_HOT static void parse_float_item(const settings_item_t* item, void* member, const char* value)
+{
+    SETTINGS_PERSIST_SET_FUNC_LOG_TAG("settings_ini_handler");
+    float* m = (float*)member;
+    const char* endptr;
+    errno = 0;
+    float val = fast_strtof(value, &endptr);
+    /* 检查转换错误或未转换任何字符 */
+    if (SP_UNLIKELY(errno != 0 || endptr == value)) {
+        /* 转换失败 使用默认值 */
+        load_item_default(item, m);
+        log_item_parse_failed(item, "float");
+    } else if (SP_UNLIKELY(val < item->u.f.min || val > item->u.f.max)) {
+        /* 超出范围 使用默认值 */
+        load_item_default(item, m);
+        log_item_out_of_range(item);
+    } else {
+        *m = val;
+        SETTINGS_PERSIST_LOG_INFO("settings.%s.%s读取并解析成功: %f", item->section, item->name, val);
+    }
+}
+
+SP_HOT static void parse_bool_item(const settings_item_t* item, void* member, const char* value)
+{
+    SETTINGS_PERSIST_SET_FUNC_LOG_TAG("settings_ini_handler");
+    bool* m = (bool*)member;
+    int b = parse_bool_strict(value);
+    if (b == 1) {
+        *m = true;
+        SETTINGS_PERSIST_LOG_INFO("settings.%s.%s读取并解析成功: true", item->section, item->name);
+    } else if (b == 0) {
+        *m = false;
+        SETTINGS_PERSIST_LOG_INFO("settings.%s.%s读取并解析成功: false", item->section, item->name);
+    } else {
+        /* 无效的布尔值 使用默认值 */
+        load_item_default(item, m);
+        log_item_parse_failed(item, "bool");
+    }
+}
+
+SP_HOT static void parse_string_item(const settings_item_t* item, void* member, const char* value)
+{
+    SETTINGS_PERSIST_SET_FUNC_LOG_TAG("settings_ini_handler");
+    char* m = (char*)member;
+    settings_copy_string(m, item->size, value);
+    SETTINGS_PERSIST_LOG_INFO("settings.%s.%s读取并解析成功: %s", item->section, item->name, m);
+}
+
+/* 按SETTINGS_ITEM_*索引的解析函数 */
+static void (*const settings_item_parsers[])(const settings_item_t*, void*, const char*) = {
+    [SETTINGS_ITEM_INT] = parse_int_item,
+    [SETTINGS_ITEM_FLOAT] = parse_float_item,
+    [SETTINGS_ITEM_BOOL] = parse_bool_item,
+    [SETTINGS_ITEM_STRING] = parse_string_item,
+};
+
+/* 所有配置项的描述表 */
+static const settings_item_t settings_items[] = {
+    {"Audio", "volume", 5, 6, "75", "[0, 100]", offsetof(Settings, Audio.volume), sizeof(((Settings*)0)->Audio.volume), SETTINGS_ITEM_INT, {.i = {0, 100}}},
+    {"Audio", "mute", 5, 4, "false", NULL, offsetof(Settings, Audio.mute), sizeof(((Settings*)0)->Audio.mute), SETTINGS_ITEM_BOOL, {.i = {0, 0}}},
+    {"Display", "brightness", 7, 10, "60", "[0, 100]", offsetof(Settings, Display.brightness), sizeof(((Settings*)0)->Display.brightness), SETTINGS_ITEM_INT, {.i = {0, 100}}},
+    {"Display", "screensaver", 7, 11, "enabled", NULL, offsetof(Settings, Display.screensaver), sizeof(((Settings*)0)->Display.screensaver), SETTINGS_ITEM_STRING, {.i = {0, 0}}},
+    {"Verify", "crc_16_ibm", 6, 10, "0", "[0, 65535]", offsetof(Settings, Verify.crc_16_ibm), sizeof(((Settings*)0)->Verify.crc_16_ibm), SETTINGS_ITEM_INT, {.i = {0, 65535}}},
+};
+
 /**
  * @brief INI文件的解析函数 需搭配inih库使用
  *
@@ -128,103 +445,39 @@ int settings_persist_set_Display_screensaver(const char* screensaver)
 int settings_ini_handler(void* user, const char* section, const char* name, const char* value) {
     SETTINGS_PERSIST_SET_FUNC_LOG_TAG("settings_ini_handler");
     Settings* settings = (Settings*)user;
-    if (!settings || !section || !name || !value)
+    if (SP_UNLIKELY(!settings || !section || !name || !value))
     {
         SETTINGS_PERSIST_LOG_ERROR("输入参数中含有NULL");
         return 0;
     }
 
-    if (strcmp(section, "Audio") == 0 && strcmp(name, "volume") == 0) {
-        char* endptr;
-        long val;
-        errno = 0;
-        val = strtol(value, &endptr, 10);
-        /* 检查转换错误或未转换任何字符 */
-        if (errno != 0 || endptr == value) {
-            /* 转换失败 使用默认值 */
-            settings->Audio.volume = 75;
-            SETTINGS_PERSIST_LOG_ERROR("settings.Audio.volume(type:int)转换失败, 已自动恢复默认值: 75");
-        } else {
-            /* 检查范围 */
-            if (val < 0 || val > 100) {
-                /* 超出范围 使用默认值 */
-                settings->Audio.volume = 75;
-                SETTINGS_PERSIST_LOG_ERROR("settings.Audio.volume超出范围[0, 100], 已自动恢复默认值: 75");
-            } else {
-                settings->Audio.volume = (int)val;
-                SETTINGS_PERSIST_LOG_INFO("settings.Audio.volume读取并解析成功: %d", (int)val);
-            }
-        }
-        return 1;
-    }
-
-    if (strcmp(section, "Audio") == 0 && strcmp(name, "mute") == 0) {
-        if (strcmp(value, "true") == 0) {
-            settings->Audio.mute = true;
-            SETTINGS_PERSIST_LOG_INFO("settings.Audio.mute读取并解析成功: true");
-        } else if (strcmp(value, "false") == 0) {
-            settings->Audio.mute = false;
-            SETTINGS_PERSIST_LOG_INFO("settings.Audio.mute读取并解析成功: false");
-        } else {
-            /* 无效的布尔值 使用默认值 */
-            settings->Audio.mute = false;
-            SETTINGS_PERSIST_LOG_ERROR("settings.Audio.mute(type:bool)转换失败, 已自动恢复默认值: false");
-        }
-        return 1;
-    }
-
-    if (strcmp(section, "Display") == 0 && strcmp(name, "brightness") == 0) {
-        char* endptr;
-        long val;
-        errno = 0;
-        val = strtol(value, &endptr, 10);
-        /* 检查转换错误或未转换任何字符 */
-        if (errno != 0 || endptr == value) {
-            /* 转换失败 使用默认值 */
-            settings->Display.brightness = 60;
-            SETTINGS_PERSIST_LOG_ERROR("settings.Display.brightness(type:int)转换失败, 已自动恢复默认值: 60");
-        } else {
-            /* 检查范围 */
-            if (val < 0 || val > 100) {
-                /* 超出范围 使用默认值 */
-                settings->Display.brightness = 60;
-                SETTINGS_PERSIST_LOG_ERROR("settings.Display.brightness超出范围[0, 100], 已自动恢复默认值: 60");
-            } else {
-                settings->Display.brightness = (int)val;
-                SETTINGS_PERSIST_LOG_INFO("settings.Display.brightness读取并解析成功: %d", (int)val);
-            }
-        }
-        return 1;
+    const settings_item_t* item = NULL;
+    size_t section_len;
+    size_t name_len;
+    /* 按(section, name)的哈希分派 */
+    switch (settings_fnv1a2(section, name, &section_len, &name_len)) {
+    case 0xADAD7625u: /* Audio.volume */
+        item = &settings_items[0];
+        break;
+    case 0x6B10E582u: /* Audio.mute */
+        item = &settings_items[1];
+        break;
+    case 0xEC4DF994u: /* Display.brightness */
+        item = &settings_items[2];
+        break;
+    case 0x28AA4444u: /* Display.screensaver */
+        item = &settings_items[3];
+        break;
+    case 0x160244E9u: /* Verify.crc_16_ibm */
+        item = &settings_items[4];
+        break;
+    default:
+        break;
     }
 
-    if (strcmp(section, "Display") == 0 && strcmp(name, "screensaver") == 0) {
-        strncpy(settings->Display.screensaver, value, sizeof(settings->Display.screensaver)-1);
-        settings->Display.screensaver[sizeof(settings->Display.screensaver)-1] = '\0';
-        SETTINGS_PERSIST_LOG_INFO("settings.Display.screensaver读取并解析成功: %s", settings->Display.screensaver);
-        return 1;
-    }
-
-    if (strcmp(section, "Verify") == 0 && strcmp(name, "crc_16_ibm") == 0) {
-        char* endptr;
-        long val;
-        errno = 0;
-        val = strtol(value, &endptr, 10);
-        /* 检查转换错误或未转换任何字符 */
-        if (errno != 0 || endptr == value) {
-            /* 转换失败 使用默认值 */
-            settings->Verify.crc_16_ibm = 0;
-            SETTINGS_PERSIST_LOG_ERROR("settings.Verify.crc_16_ibm(type:int)转换失败, 已自动恢复默认值: 0");
-        } else {
-            /* 检查范围 */
-            if (val < 0 || val > 65535) {
-                /* 超出范围 使用默认值 */
-                settings->Verify.crc_16_ibm = 0;
-                SETTINGS_PERSIST_LOG_ERROR("settings.Verify.crc_16_ibm超出范围[0, 65535], 已自动恢复默认值: 0");
-            } else {
-                settings->Verify.crc_16_ibm = (int)val;
-                SETTINGS_PERSIST_LOG_INFO("settings.Verify.crc_16_ibm读取并解析成功: %d", (int)val);
-            }
-        }
+    /* 哈希命中后再确认一次 排除未知记录恰好哈希相同的情况 */
+    if (SP_LIKELY(item != NULL) && item_matches(item, section, section_len, name, name_len)) {
+        settings_item_parsers[item->type](item, (char*)settings + item->offset, value);
         return 1;
     }
 
@@ -246,18 +499,7 @@ void settings_restore_defaults(Settings *settings) {
         return;
     }
 
-    /* 恢复 Audio 至默认值 */
-    settings->Audio.volume = 75;
-    settings->Audio.mute = false;
-
-    /* 恢复 Display 至默认值 */
-    settings->Display.brightness = 60;
-    strncpy(settings->Display.screensaver, "enabled", sizeof(settings->Display.screensaver)-1);
-    settings->Display.screensaver[sizeof(settings->Display.screensaver)-1] = '\0';
-
-    /* 恢复 Verify 至默认值 */
-    settings->Verify.crc_16_ibm = 0;
-
+    memcpy(settings, &kSettingsDefaults, sizeof(*settings));
 }
 
 int settings_persist_reset_all_data(void)
@@ -280,6 +522,83 @@ int settings_persist_reset_all_data(void)
 }
 
 
+/* 0~99的两位十进制字符表 每次处理两位数字 */
+static const char digits_lut[] =
+    "0001020304050607080910111213141516171819"
+    "2021222324252627282930313233343536373839"
+    "4041424344454647484950515253545556575859"
+    "6061626364656667686970717273747576777879"
+    "8081828384858687888990919293949596979899";
+
+/**
+ * @brief 将无符号整数以十进制写入out(不写入'\0')
+ *
+ * @param[in] v 待格式化的值
+ * @param[out] out 输出位置 至少需要10字节
+ * @return char* 写入结束的位置
+ */
+static inline char* fast_utoa10(unsigned v, char* out)
+{
+    char tmp[10];
+    char* t = tmp + sizeof(tmp);
+    while (v >= 100) {
+        unsigned i = (v % 100) * 2;
+        v /= 100;
+        *--t = digits_lut[i + 1];
+        *--t = digits_lut[i];
+    }
+    if (v >= 10) {
+        *--t = digits_lut[v * 2 + 1];
+        *--t = digits_lut[v * 2];
+    } else {
+        *--t = (char)('0' + v);
+    }
+    size_t n = (size_t)(tmp + sizeof(tmp) - t);
+    memcpy(out, t, n);
+    return out + n;
+}
+
+/**
+ * @brief 将整数以十进制写入out(不写入'\0'), 结果与printf的"%d"一致
+ *
+ * @param[in] v 待格式化的值
+ * @param[out] out 输出位置 至少需要11字节
+ * @return char* 写入结束的位置
+ */
+static inline char* fast_itoa10(int v, char* out)
+{
+    unsigned u = (unsigned)v;
+    if (v < 0) {
+        *out++ = '-';
+        u = 0u - u;
+    }
+    return fast_utoa10(u, out);
+}
+
+/**
+ * @brief 将缓冲区中的数据全部写入fd(处理被信号中断与部分写入的情况)
+ *
+ * @param[in] fd 目标文件描述符
+ * @param[in] buf 待写入的数据
+ * @param[in] len 待写入的字节数
+ * @return 0成功 -1失败(errno由write设置)
+ */
+static int write_all(int fd, const char* buf, size_t len)
+{
+    while (len > 0) {
+        ssize_t n = write(fd, buf, len);
+        if (n < 0) {
+            if (errno == EINTR) {
+                continue;
+            }
+            return -1;
+        }
+        buf += n;
+        len -= (size_t)n;
+    }
+    return 0;
+}
+
 /**
  * @brief 将设置保存到对应文件中(以ini格式)
  *
@@ -289,6 +608,7 @@ int settings_persist_reset_all_data(void)
  * @retval 0 保存成功
  * @retval -1 保存失败: 输入参数中含有NULL
  * @retval -2 保存失败: 未知原因
+ * @note 使用静态缓冲区, 不可重入; 调用方(save_settings_with_crc)须持有cache_mutex
  */
 int write_settings_to_file(const char* filename, const Settings* settings) {
     SETTINGS_PERSIST_SET_FUNC_LOG_TAG("write_settings_to_file");
@@ -299,32 +619,54 @@ int write_settings_to_file(const char* filename, const Settings* settings) {
         return -1;
     }
 
-    FILE* file = NULL;
-    int retries = 2; /* 最多重试2次(1次正常写入 1次删除重建写入) */
+    /*
+     * 完整文件内容的上限由生成器根据各配置项的最大长度算出
+     * 大小随配置项增长, 不能放在工作线程8KB的栈上, 因此使用静态存储;
+     * 所有调用方均在持有cache_mutex时调用, 不会并发使用该缓冲区
+     */
+    static char buf[123];
+    char* p = buf;
+    memcpy(p, "[Audio]\nvolume=", 15);
+    p += 15;
+    p = fast_itoa10(settings->Audio.volume, p);
+    memcpy(p, "\nmute=", 6);
+    p += 6;
+    if (settings->Audio.mute) {
+        memcpy(p, "true", 4);
+        p += 4;
+    } else {
+        memcpy(p, "false", 5);
+        p += 5;
+    }
+    memcpy(p, "\n[Display]\nbrightness=", 22);
+    p += 22;
+    p = fast_itoa10(settings->Display.brightness, p);
+    memcpy(p, "\nscreensaver=", 13);
+    p += 13;
+    {
+        size_t n = strnlen(settings->Display.screensaver, sizeof(settings->Display.screensaver) - 1);
+        memcpy(p, settings->Display.screensaver, n);
+        p += n;
+    }
+    memcpy(p, "\n[Verify]\ncrc_16_ibm=", 21);
+    p += 21;
+    p = fast_itoa10(settings->Verify.crc_16_ibm, p);
+    memcpy(p, "\n", 1);
+    p += 1;
+    size_t len = (size_t)(p - buf);
 
+    int retries = 2; /* 最多重试2次(1次正常写入 1次删除重建写入) */
     while (retries-- > 0) {
         /* 尝试正常打开并写入 */
-        file = fopen(filename, "w");
-        if (file) {
-            /* Write Audio settings */
-            fprintf(file, "[Audio]\n");
-            fprintf(file, "volume=%d\n", settings->Audio.volume);
-            fprintf(file, "mute=%s\n", settings->Audio.mute ? "true" : "false");
-            /* Write Display settings */
-            fprintf(file, "[Display]\n");
-            fprintf(file, "brightness=%d\n", settings->Display.brightness);
-            fprintf(file, "screensaver=%s\n", settings->Display.screensaver);
-            /* Write Verify settings */
-            fprintf(file, "[Verify]\n");
-            fprintf(file, "crc_16_ibm=%d\n", settings->Verify.crc_16_ibm);
-            /* 确保数据刷盘 */
-            int fd = fileno(file);
-            if (fflush(file) != 0 || fsync(fd) != 0) {
-                fclose(file);
+        int fd = open(filename, O_WRONLY | O_CREAT | O_TRUNC | O_CLOEXEC, 0666);
+        if (fd >= 0) {
+            /* 一次性写入并确保数据刷盘(文件长度等读回所需的元数据也会由fdatasync一并落盘) */
+            if (write_all(fd, buf, len) != 0 || fdatasync(fd) != 0) {
+                close(fd);
                 errno = EIO;
-                continue; /* 刷盘失败 开始重试 */
+                continue; /* 写入或刷盘失败 开始重试 */
             }
-            fclose(file);
+            close(fd);
             SETTINGS_PERSIST_LOG_DEBUG("成功保存");
             return 0; /* 写入成功 */
         }
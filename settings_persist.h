@@ -3,7 +3,7 @@
  * @author auto-generated
  * @brief Settings_persist模块的头文件
  * @version 0.1
- * @date 2025-11-06 15:26:40
+ * @date 2026-10-14 10:51:39
  *
  * @attention This file is auto-generated by generate_settings_from_ini.py. Do not edit manually!
  * @copyright Copyright (c) 2025
@@ -35,6 +35,8 @@
  * - 开发调试阶段: 建议使用SETTINGS_PERSIST_LOG_LEVEL_DEBUG
  * - 测试阶段: 建议使用SETTINGS_PERSIST_LOG_LEVEL_INFO
  * - 生产环境: 建议使用SETTINGS_PERSIST_LOG_LEVEL_WARN或SETTINGS_PERSIST_LOG_LEVEL_ERROR
+ * 低于当前等级的日志宏在预处理阶段即展开为空操作, 格式串与参数都不会被求值,
+ * 因此调用处(包括自动生成的代码)无需再额外做运行时的等级判断
  */
 #define SETTINGS_PERSIST_CURRENT_LOG_LEVEL SETTINGS_PERSIST_LOG_LEVEL_DEBUG
 // #define SETTINGS_PERSIST_CURRENT_LOG_LEVEL SETTINGS_PERSIST_LOG_LEVEL_INFO